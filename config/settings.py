@@ -1,9 +1,28 @@
 # config/settings.py
 import calendar
+import os
 
 
 DAYS_IN_YEAR = {year: 366 if calendar.isleap(year) else 365 for year in range(2025, 2101)}
 
+# Opt-in: store text columns of the bronze loaders as 'string[pyarrow]' (needs pyarrow)
+USE_ARROW_STRINGS = False
+
+# dtype of the R1 year columns; 'float32' halves their memory but adds rounding noise to P1-vs-R1 diffs
+R1_YEAR_DTYPE = "float64"
+
+# dtype TSEComparator sums and diffs year columns in; 'float32' halves the block but rounds the diffs
+COMPARE_YEAR_DTYPE = "float64"
+
+# Verbose loader diagnostics (value dumps, frame previews); set QC_DEBUG=1 to enable
+QC_DEBUG = bool(os.environ.get("QC_DEBUG"))
+
+# Parsed-input cache (src.core.utils.cached_parquet): a Parquet copy of every loaded file,
+# i.e. of the source data, kept in ~/.cache/qc_tool. False disables reading and writing it;
+# the directory is trimmed to PARQUET_CACHE_MAX_MB, least recently used files first
+PARQUET_CACHE = True
+PARQUET_CACHE_MAX_MB = 1024
+
 
 UNCERTAINTY_MAP = {
     'SEC': 'Low YAP',
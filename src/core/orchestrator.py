@@ -1,9 +1,20 @@
 # src/core/orchestrator.py
 from __future__ import annotations
+import codecs
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Optional, Tuple
 import os
+import threading
 import pandas as pd
 
+try:  # optional: faster debug CSV dumps
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+except ImportError:
+    pa = pcsv = None
+
+
 # loaders
 from src.data.bronze.bronze_p1_tse import LoaderP1TSE
 from src.data.bronze.bronze_p1_hier import LoaderP1Hierarchy
@@ -14,6 +25,57 @@ from src.data.models.tse_compare import TSEComparator
 from src.data.models.hierarchy_compare import HierarchyComparison
 
 
+# ---------------- file-level memo (keyed on path + mtime + size) ----------------
+# Switching a path away and back re-uses the parsed DF as long as the file on disk
+# is unchanged; touching/replacing the file changes the key and forces a re-read.
+# Every caller gets the same DataFrame object: treat it as read-only (the comparators'
+# setters take shallow copies and only replace whole columns). clear_file_memo() drops
+# them all (Clear in the UI); otherwise the current and one previous file are kept.
+def _file_key(path: str) -> Tuple[str, int, int]:
+    st = os.stat(path)
+    return path, st.st_mtime_ns, st.st_size
+
+
+@lru_cache(maxsize=2)
+def _cached_p1_tse(path: str, mtime_ns: int, size: int) -> Optional[pd.DataFrame]:
+    df = LoaderP1TSE(path).extract_production_data()
+    return df if isinstance(df, pd.DataFrame) else None
+
+
+@lru_cache(maxsize=2)
+def _cached_p1_hierarchy(path: str, mtime_ns: int, size: int, sheet: str | int) -> Optional[pd.DataFrame]:
+    df = LoaderP1Hierarchy(path, sheet_name=sheet).load()
+    return df if isinstance(df, pd.DataFrame) else None
+
+
+@lru_cache(maxsize=2)
+def _cached_r1(path: str, mtime_ns: int, size: int) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    r1 = R1Loader(path)
+    df_raw = r1.load_data()
+    # hierarchy DF
+    if hasattr(r1, "create_hierarchy_dataframe"):
+        df_hier = r1.create_hierarchy_dataframe()
+    elif hasattr(r1, "create_project_hierarchy"):
+        df_hier = r1.create_project_hierarchy()
+    elif hasattr(r1, "load_hierarchy"):
+        df_hier = r1.load_hierarchy()
+    else:
+        df_hier = df_raw
+    return df_raw, df_hier
+
+
+@lru_cache(maxsize=2)
+def _cached_r1_production(path: str, mtime_ns: int, size: int) -> pd.DataFrame:
+    # Aggregated from the memoized raw frame; no second CSV parse
+    r1 = R1Loader(path)
+    r1.df = _cached_r1(path, mtime_ns, size)[0]
+    return r1.create_production_dataframe()
+
+
+def clear_file_memo() -> None:
+    for memo in (_cached_p1_tse, _cached_p1_hierarchy, _cached_r1, _cached_r1_production):
+        memo.cache_clear()
+
 
 class DataOrchestrator:
     """Owns file paths, cached DFs and derived builds. No Qt, easy to test."""
@@ -36,6 +98,11 @@ class DataOrchestrator:
         self.df_hier_compare: Optional[pd.DataFrame] = None
         self.hc_model: Optional[HierarchyComparison] = None
 
+        # one lock per source so concurrent load_all() calls keep the no-reload guard
+        self._lock_p1_tse = threading.Lock()
+        self._lock_p1_hier = threading.Lock()
+        self._lock_r1 = threading.Lock()
+
     # ---------------- paths (clear caches if change) ----------------
     def set_p1_tse(self, path: Optional[str]) -> None:
         if path != self.p1_tse_path:
@@ -62,45 +129,52 @@ class DataOrchestrator:
 
     # ---------------- loads (no‑reload guard) ----------------
     def load_p1_tse(self) -> Optional[pd.DataFrame]:
-        if self.df_p1_tse is not None or not self.p1_tse_path:
+        with self._lock_p1_tse:
+            if self.df_p1_tse is not None or not self.p1_tse_path:
+                return self.df_p1_tse
+            self.df_p1_tse = _cached_p1_tse(*_file_key(self.p1_tse_path))
+            rows = len(self.df_p1_tse) if isinstance(self.df_p1_tse, pd.DataFrame) else 0
+            print(f"✅ P1 TSE loaded ({rows} rows): {os.path.basename(self.p1_tse_path)}")
             return self.df_p1_tse
-        loader = LoaderP1TSE(self.p1_tse_path)
-        df = loader.extract_production_data()  # correct API for your loader
-        self.df_p1_tse = df if isinstance(df, pd.DataFrame) else None
-        rows = len(self.df_p1_tse) if isinstance(self.df_p1_tse, pd.DataFrame) else 0
-        print(f"✅ P1 TSE loaded ({rows} rows): {os.path.basename(self.p1_tse_path)}")
-        return self.df_p1_tse
 
     def load_p1_hierarchy(self) -> Optional[pd.DataFrame]:
-        if self.df_p1_hier is not None or not self.p1_hier_path:
+        with self._lock_p1_hier:
+            if self.df_p1_hier is not None or not self.p1_hier_path:
+                return self.df_p1_hier
+            sheet = 0 if self.p1_hier_sheet in (None, "", "None") else self.p1_hier_sheet
+            self.df_p1_hier = _cached_p1_hierarchy(*_file_key(self.p1_hier_path), sheet)
+            rows = len(self.df_p1_hier) if isinstance(self.df_p1_hier, pd.DataFrame) else 0
+            print(f"✅ P1 Hierarchy loaded ({rows} rows): {os.path.basename(self.p1_hier_path)}")
             return self.df_p1_hier
-        sheet = 0 if self.p1_hier_sheet in (None, "", "None") else self.p1_hier_sheet
-        loader = LoaderP1Hierarchy(self.p1_hier_path, sheet_name=sheet)
-        df = loader.load()
-        self.df_p1_hier = df if isinstance(df, pd.DataFrame) else None
-        rows = len(self.df_p1_hier) if isinstance(self.df_p1_hier, pd.DataFrame) else 0
-        print(f"✅ P1 Hierarchy loaded ({rows} rows): {os.path.basename(self.p1_hier_path)}")
-        return self.df_p1_hier
 
     def load_r1(self) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
-        if self.df_r1_raw is not None and self.df_r1_hier is not None:
+        with self._lock_r1:
+            if self.df_r1_raw is not None and self.df_r1_hier is not None:
+                return self.df_r1_raw, self.df_r1_hier
+            if not self.r1_path:
+                return None, None
+            self.df_r1_raw, self.df_r1_hier = _cached_r1(*_file_key(self.r1_path))
+            print(f"✅ R1 raw loaded ({len(self.df_r1_raw) if self.df_r1_raw is not None else 0} rows)")
+            print(f"🧱 R1 hierarchy cached ({len(self.df_r1_hier) if self.df_r1_hier is not None else 0} rows)")
             return self.df_r1_raw, self.df_r1_hier
-        if not self.r1_path:
-            return None, None
-        r1 = R1Loader(self.r1_path)
-        self.df_r1_raw = r1.load_data()
-        # hierarchy DF
-        if hasattr(r1, "create_hierarchy_dataframe"):
-            self.df_r1_hier = r1.create_hierarchy_dataframe()
-        elif hasattr(r1, "create_project_hierarchy"):
-            self.df_r1_hier = r1.create_project_hierarchy()
-        elif hasattr(r1, "load_hierarchy"):
-            self.df_r1_hier = r1.load_hierarchy()
-        else:
-            self.df_r1_hier = self.df_r1_raw
-        print(f"✅ R1 raw loaded ({len(self.df_r1_raw) if self.df_r1_raw is not None else 0} rows)")
-        print(f"🧱 R1 hierarchy cached ({len(self.df_r1_hier) if self.df_r1_hier is not None else 0} rows)")
-        return self.df_r1_raw, self.df_r1_hier
+
+    def load_all(self, p1_tse: bool = True, p1_hier: bool = True, r1: bool = True) -> None:
+        """
+        Run the selected loads concurrently (independent files; the Excel/CSV
+        parsers spend most of their time in C). Re-raises the first loader error.
+        """
+        jobs = [fn for want, fn in ((p1_tse, self.load_p1_tse),
+                                    (p1_hier, self.load_p1_hierarchy),
+                                    (r1, self.load_r1)) if want]
+        if len(jobs) <= 1:
+            for fn in jobs:
+                fn()
+            return
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = [pool.submit(fn) for fn in jobs]
+        for fut in futures:
+            fut.result()
+
     
         
     def _save_debug_df(self, df: pd.DataFrame | None, name: str) -> None:
@@ -113,7 +187,19 @@ class DataOrchestrator:
         ts = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
         path = out_dir / f"{name}_{ts}.csv"
         try:
-            df.to_csv(path, index=False, encoding="utf-8-sig")
+            table = None
+            if pcsv is not None:
+                try:
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                except (pa.ArrowException, TypeError, ValueError):
+                    pass  # mixed-type object columns: let pandas write it
+            if table is not None:
+                # C writer with a fixed-size buffer; keep the BOM Excel expects
+                with open(path, "wb") as f:
+                    f.write(codecs.BOM_UTF8)
+                    pcsv.write_csv(table, f)
+            else:
+                df.to_csv(path, index=False, encoding="utf-8-sig")
             print(f"📝 Debug saved: {path}")
         except Exception as e:
             print(f"⚠️ Could not write debug CSV {path}: {e}")
@@ -125,13 +211,16 @@ class DataOrchestrator:
             return self.df_tse_compare
         if not (self.p1_tse_path and self.r1_path):
             return None
-        # Comparator reads from paths (consistent with your current models.py)
-        comp = TSEComparator.from_paths(self.p1_tse_path, self.r1_path)
+        # From the memoized frames (load_* is a no-op once loaded), not a re-parse
+        df_p1 = self.load_p1_tse()
+        if df_p1 is None:
+            raise ValueError("P1 TSE data could not be loaded")
+        comp = TSEComparator().set_p1_df(df_p1).set_r1_df(_cached_r1_production(*_file_key(self.r1_path)))
         self.df_tse_compare = comp.compare()
         print("📊 TSE comparison ready.")
         return self.df_tse_compare
 
-    def build_hierarchy_compare(self):
+    def build_hierarchy_compare(self) -> Tuple[Optional[HierarchyComparison], Optional[pd.DataFrame]]:
         if self.df_hier_compare is not None and self.hc_model is not None:
             return self.hc_model, self.df_hier_compare
         if self.df_r1_hier is None or self.df_p1_hier is None:
@@ -142,4 +231,4 @@ class DataOrchestrator:
         self.df_hier_compare = hc.build()
         self.hc_model = hc
         print(f"✅ Hierarchy comparison ready ({len(self.df_hier_compare)} rows)")
-        return hc, self.df_hier_compare
\ No newline at end of file
+        return hc, self.df_hier_compare
@@ -1,5 +1,7 @@
 # src/core/publish.py
+import inspect
 import traceback
+from weakref import WeakKeyDictionary
 
 def publish_tse(win, df):
     if df is None:
@@ -12,36 +14,51 @@ def publish_tse(win, df):
         print("⚠️ publish_tse failed:")
         traceback.print_exc()
 
+# tab type -> ordered [(label, publisher)], resolved once per type
+_PUB_CACHE: "WeakKeyDictionary[type, list]" = WeakKeyDictionary()
+
+def _publishers_for(tab) -> list:
+    """
+    Resolve (once per tab type) which publish calls the tab supports, in order:
+      1) set_model(model, df_compare=df)   if set_model accepts df_compare
+         set_model(model)                  otherwise
+      2) set_data(df)
+    """
+    cls = type(tab)
+    pubs = _PUB_CACHE.get(cls)
+    if pubs is not None:
+        return pubs
+
+    pubs = []
+    set_model = getattr(cls, "set_model", None)
+    if set_model is not None:
+        try:
+            params = inspect.signature(set_model).parameters.values()
+        except (TypeError, ValueError):
+            params = ()
+        if any(p.name == "df_compare" or p.kind is p.VAR_KEYWORD for p in params):
+            pubs.append(("set_model(...)", lambda t, m, df: t.set_model(m, df_compare=df)))
+        else:
+            pubs.append(("set_model(...)", lambda t, m, df: t.set_model(m)))
+    if hasattr(cls, "set_data"):
+        pubs.append(("set_data(df)", lambda t, m, df: t.set_data(df)))
+    _PUB_CACHE[cls] = pubs
+    return pubs
+
 def _try_publish_one(tab, hc_model, df) -> bool:
     """
-    Try (in order):
-      1) set_model(model, df_compare=df)
-      2) set_model(model)
-      3) set_data(df)
+    Try the tab's cached publishers in order (see _publishers_for).
     Returns True if any call succeeded, False otherwise.
     """
-    # 1) set_model(model, df_compare=df)
-    try:
-        if hasattr(tab, "set_model"):
-            try:
-                tab.set_model(hc_model, df_compare=df)
-                return True
-            except TypeError:
-                # signature doesn't accept df_compare
-                tab.set_model(hc_model)
-                return True
-    except Exception:
-        print(f"⚠️ {tab.__class__.__name__}.set_model(...) failed:")
-        traceback.print_exc()
-
-    # 3) set_data(df)
-    try:
-        if hasattr(tab, "set_data") and df is not None:
-            tab.set_data(df)
+    for label, publish in _publishers_for(tab):
+        if label == "set_data(df)" and df is None:
+            continue
+        try:
+            publish(tab, hc_model, df)
             return True
-    except Exception:
-        print(f"⚠️ {tab.__class__.__name__}.set_data(df) failed:")
-        traceback.print_exc()
+        except Exception:
+            print(f"⚠️ {tab.__class__.__name__}.{label} failed:")
+            traceback.print_exc()
 
     return False
 
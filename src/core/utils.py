@@ -0,0 +1,228 @@
+# src/core/utils.py
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.settings import PARQUET_CACHE, PARQUET_CACHE_MAX_MB, USE_ARROW_STRINGS
+
+# Parsed-source cache (see cached_parquet)
+PARQUET_CACHE_DIR = Path.home() / ".cache" / "qc_tool"
+# Part of every cache key: bump when _parquet_safe/_read_cached or a loader's parse changes,
+# so existing files are not served in the old shape
+PARQUET_CACHE_FORMAT = 2
+
+
+@lru_cache(maxsize=None)
+def resolve_excel_engine(preferred: Optional[str] = "calamine") -> Optional[str]:
+    """
+    Return the pd.read_excel engine to use.
+    'calamine' (Rust reader, much faster on large XLSX) needs pandas>=2.2 and the
+    python-calamine package; when either is missing return None so pandas picks its
+    default engine for the file type (openpyxl for .xlsx).
+    """
+    if preferred != "calamine":
+        return preferred
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return None
+    major, minor = (int(x) for x in pd.__version__.split(".")[:2])
+    return "calamine" if (major, minor) >= (2, 2) else None
+
+
+def per_unique(s: pd.Series, fn: Callable[[pd.Series], pd.Series]) -> pd.Series:
+    """
+    Run a vectorized normalizer over the distinct values of `s` only and broadcast
+    the result back by factorize codes. Key/name columns repeat heavily, so the
+    .str chain touches k uniques instead of N rows. Missing values are passed to
+    `fn` like any other value; values that compare equal (1 / 1.0) share one result.
+    """
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    return fn(pd.Series(uniques)).take(codes).set_axis(s.index)
+
+
+def strip_float_suffix(s: pd.Series) -> pd.Series:
+    """
+    Drop a trailing '.0' from text IDs ('1234.0' -> '1234'), left behind when an ID
+    column was read as float and cast to str. endswith + slice, no regex per cell.
+    """
+    return s.mask(s.str.endswith(".0"), s.str[:-2])
+
+
+def categorize(df: pd.DataFrame, cols) -> tuple[pd.DataFrame, Callable[[pd.DataFrame], pd.DataFrame]]:
+    """
+    Copy of `df` with the low-cardinality key `cols` as category, so a groupby/pivot
+    hashes int codes instead of strings, plus `restore`: restore(result) casts those
+    columns of a result back to their original dtypes, so no categoricals reach callers.
+    """
+    cols = [c for c in cols if c in df.columns]
+    dtypes = df[cols].dtypes.to_dict()
+
+    def restore(out: pd.DataFrame) -> pd.DataFrame:
+        return out.astype({c: dt for c, dt in dtypes.items() if c in out.columns})
+
+    return df.astype({c: "category" for c in cols}), restore
+
+
+def group_sum(codes: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Row-wise sums of a 2-D `values` block per group code (0..G-1, every code present,
+    e.g. from groupby().ngroup()). One stable sort by code, then one np.add.reduceat
+    over all columns; row i of the result is group i. NaN is not skipped - zero it first.
+    """
+    order = np.argsort(codes, kind="stable")
+    if not len(order):
+        return np.empty((0, values.shape[1]), dtype=values.dtype)
+    bounds = np.r_[0, np.flatnonzero(np.diff(codes[order])) + 1]
+    return np.add.reduceat(values[order], bounds, axis=0)
+
+
+def cached_parquet(src: str | Path, loader_fn: Callable[[], pd.DataFrame], *key_parts) -> pd.DataFrame:
+    """
+    Parse `src` with `loader_fn` once and keep a Parquet copy in PARQUET_CACHE_DIR.
+    Files are named <source key>_<version>.parquet: the source key hashes the absolute
+    path and *key_parts (pass anything that changes what `loader_fn` reads - sheet name,
+    column subset), the version hashes mtime and size. Writing a new version deletes the
+    older ones for the same source key, and the whole directory is kept under
+    settings.PARQUET_CACHE_MAX_MB (least recently used first). A hit and a miss return
+    the same frame: the miss path hands back the file it just wrote.
+    Off with settings.PARQUET_CACHE = False; without pyarrow (or if the cache dir is
+    not writable) this just calls `loader_fn()`.
+    """
+    if not PARQUET_CACHE:
+        return loader_fn()
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return loader_fn()
+
+    src = Path(src)
+    st = src.stat()
+    src_key = _short_hash("|".join(map(str, (PARQUET_CACHE_FORMAT, src.resolve(), *key_parts))), 16)
+    version = _short_hash(f"{st.st_mtime_ns}|{st.st_size}", 8)
+    pq_path = PARQUET_CACHE_DIR / f"{src_key}_{version}.parquet"
+    if pq_path.exists():
+        try:
+            df = _read_cached(pq_path)
+            pq_path.touch()  # mtime = last use, for the size cap
+            return df
+        except Exception as e:
+            print(f"⚠️ Parquet cache unreadable, re-parsing {src.name}: {e}")
+
+    df = _parquet_safe(loader_fn())
+    try:
+        PARQUET_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(pq_path, index=False, compression="zstd")
+        for stale in PARQUET_CACHE_DIR.glob(f"{src_key}_*.parquet"):
+            if stale != pq_path:
+                stale.unlink(missing_ok=True)
+        _trim_cache(keep=pq_path)
+        # Return what a later hit will read, so both paths give the same frame
+        return _read_cached(pq_path)
+    except Exception as e:
+        print(f"⚠️ Could not write Parquet cache for {src.name}: {e}")
+    return _none_to_nan(df)
+
+
+def _short_hash(text: str, n: int) -> str:
+    return hashlib.blake2b(text.encode()).hexdigest()[:n]
+
+
+def _trim_cache(keep: Path) -> None:
+    """Delete the least recently used cache files until the directory fits PARQUET_CACHE_MAX_MB."""
+    files = []
+    for f in PARQUET_CACHE_DIR.glob("*.parquet"):
+        try:
+            st = f.stat()
+        except OSError:
+            continue
+        files.append((st.st_mtime, st.st_size, f))
+    budget = PARQUET_CACHE_MAX_MB * 1024 * 1024
+    total = sum(size for _, size, _ in files)
+    for _, size, f in sorted(files, key=lambda t: t[0]):
+        if total <= budget:
+            break
+        if f == keep:
+            continue
+        f.unlink(missing_ok=True)
+        total -= size
+
+
+def _none_to_nan(df: pd.DataFrame) -> pd.DataFrame:
+    """Missing values in object columns as NaN (Arrow hands back None), as the loaders expect."""
+    obj = [c for c in df.columns if df[c].dtype == object]
+    if obj:
+        df[obj] = df[obj].where(df[obj].notna(), np.nan)
+    return df
+
+
+def _read_cached(pq_path: Path) -> pd.DataFrame:
+    """
+    Read a cache file back with the loader's dtypes: Arrow types object columns it
+    accepted (dates, numbers, bools with gaps), so those go back to object, and
+    Arrow hands back None for missing values where the loaders expect NaN.
+    """
+    import pyarrow.parquet as pq
+
+    df = pd.read_parquet(pq_path)
+    meta = pq.read_schema(pq_path).pandas_metadata or {}
+    was_object = {c["name"] for c in meta.get("columns", []) if c.get("numpy_type") == "object"}
+    for col in df.columns:
+        if col in was_object and df[col].dtype != object:
+            df[col] = df[col].astype(object)
+    return _none_to_nan(df)
+
+
+def _parquet_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Arrow needs one type per column. Only object columns Arrow rejects - text mixed
+    with numbers or dates (e.g. Year = '2025 01' / 2028, IDs typed both ways) - are
+    stored as text; every other column is left as read. Missing values stay missing.
+    Callers relying on this: the ID/name columns are cast with astype(str) by every
+    loader anyway; LoaderP1AE passes a mixed 'Year' through as YEAR, now all text.
+    """
+    import pyarrow as pa
+
+    try:
+        pa.Table.from_pandas(df, preserve_index=False)
+        return df
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        pass
+
+    def _rejected(s: pd.Series) -> bool:
+        try:
+            pa.array(s, from_pandas=True)
+            return False
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            return True
+
+    mixed = [c for c in df.columns if df[c].dtype == object and _rejected(df[c])]
+    if not mixed:
+        return df
+    out = df.copy()
+    for c in mixed:
+        out[c] = df[c].map(lambda v: v if pd.isna(v) else str(v))
+    return out
+
+
+def to_arrow_strings(df: pd.DataFrame, enabled: Optional[bool] = None) -> pd.DataFrame:
+    """
+    Convert pure-text object columns to 'string[pyarrow]' in place (one Arrow buffer
+    per column instead of a Python object per cell).
+    Opt-in via settings.USE_ARROW_STRINGS (or `enabled`); no-op without pyarrow.
+    Mixed columns (numbers stored as object) are left alone.
+    """
+    if not (USE_ARROW_STRINGS if enabled is None else enabled):
+        return df
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return df
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) == "string":
+            df[col] = df[col].astype("string[pyarrow]")
+    return df
@@ -2,20 +2,23 @@
 
 import pandas as pd
 
+from src.core.utils import cached_parquet, resolve_excel_engine
+
 class LoaderAnaplanHier:
     """
     Anaplan DIS loader.
     TODO: implement schema & transformations.
     """
-    def __init__(self, path: str):
+    def __init__(self, path: str, engine: str = "calamine"):
         self.path = path
+        self.engine = resolve_excel_engine(engine)
 
     def load(self) -> pd.DataFrame:
         p = self.path.lower()
         if p.endswith(".csv"):
-            df = pd.read_csv(self.path)
+            df = cached_parquet(self.path, lambda: pd.read_csv(self.path), "anaplan_hier")
         elif p.endswith((".xlsx", ".xls")):
-            df = pd.read_excel(self.path, engine="openpyxl")
+            df = cached_parquet(self.path, lambda: pd.read_excel(self.path, engine=self.engine), "anaplan_hier")
         else:
             raise ValueError("Unsupported Anaplan DIS format; expected CSV or Excel.")
         # TODO: clean/normalize columns
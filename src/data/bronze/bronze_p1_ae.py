@@ -6,6 +6,11 @@ from typing import Optional
 from pathlib import Path
 import re
 
+from src.core.utils import cached_parquet, resolve_excel_engine
+
+# First 4-digit run in a 'Year' cell (fallback for values that do not start with the year)
+YEAR_RE = re.compile(r"(\d{4})")
+
 
 class LoaderP1AE:
     """
@@ -57,9 +62,17 @@ class LoaderP1AE:
         "06. Gas CiO - SWIS (or GES) - yr volume": "GAS_CIO_VOL_Y",
     }
 
-    def __init__(self, path: str, sheet_name: Optional[str | int] = 0):
+    # 'Uncertainty/Valuation' literals that do not follow the '<UNCERTAINTY> <VALUATION>' form
+    UV_SPECIAL = {
+        "Low": ("Low", "PR"),
+        "High": ("High", "PR"),
+        "SEC": ("Low", "YAP"),
+    }
+
+    def __init__(self, path: str, sheet_name: Optional[str | int] = 0, engine: str = "calamine"):
         self.path = str(path)
         self.sheet_name = sheet_name
+        self.engine = resolve_excel_engine(engine)
         self.df_p1_ae: Optional[pd.DataFrame] = None
 
     # ----- internal helpers -----
@@ -67,26 +80,17 @@ class LoaderP1AE:
     def _split_uncertainty_valuation(series: pd.Series) -> pd.DataFrame:
         """
         Mirror the splitting logic from LoaderP1TSE: handle 'Low', 'High', 'SEC', and 'X Y' forms.
+        Vectorized: split on the first space, then override the special literals.
         """
-        def split_value(value):
-            if pd.isna(value):
-                return pd.Series(["", ""])
-            s = str(value).strip()
-            if s == "Low":
-                return pd.Series(["Low", "PR"])
-            elif s == "High":
-                return pd.Series(["High", "PR"])
-            elif s == "SEC":
-                return pd.Series(["Low", "YAP"])
-            elif " " in s:
-                a, b = s.split(" ", 1)
-                return pd.Series([a, b])
-            else:
-                return pd.Series([s, ""])
-
-        out = series.apply(split_value)
-        out.columns = ["UNCERTAINTY", "VALUATION"]
-        return out
+        s = series.astype("string").str.strip()
+        parts = s.str.split(" ", n=1, expand=True).reindex(columns=[0, 1])
+        special = s.isin(list(LoaderP1AE.UV_SPECIAL))
+        unc = parts[0].mask(special, s.map({k: v[0] for k, v in LoaderP1AE.UV_SPECIAL.items()}))
+        val = parts[1].mask(special, s.map({k: v[1] for k, v in LoaderP1AE.UV_SPECIAL.items()}))
+        return pd.DataFrame({
+            "UNCERTAINTY": unc.fillna("").astype(object).infer_objects(),
+            "VALUATION": val.fillna("").astype(object).infer_objects(),
+        }, index=series.index)
 
     @staticmethod
     def _year_only(series: pd.Series) -> pd.Series:
@@ -94,13 +98,20 @@ class LoaderP1AE:
         Extract a 4-digit year from values like '2025 01' OR '2028'.
         (Different from TSE's '(YYYY)' pattern; this matches the AE file.)
         """
-        return series.astype(str).str.extract(r"(\d{4})")[0]
+        s = series.astype(str).str.strip()
+        out = s.str[:4]
+        ok = out.str.isdigit() & (out.str.len() == 4)
+        if not ok.all():
+            # Unexpected formats only: fall back to the regex search on those rows
+            out = out.where(ok, s[~ok].str.extract(YEAR_RE)[0])
+        return out
 
     @staticmethod
     def _to_numeric(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
-        for c in cols:
-            if c in df.columns:
-                df[c] = pd.to_numeric(df[c], errors="coerce")
+        cols = [c for c in cols if c in df.columns]
+        if cols:
+            # Convert the block, then write it back in one assignment
+            df[cols] = df[cols].apply(pd.to_numeric, errors="coerce")
         return df
 
     # ----- public API -----
@@ -108,8 +119,15 @@ class LoaderP1AE:
         """
         Load the AE forecast Excel and return a cleaned DataFrame named df_p1_ae.
         """
-        # Read the sheet
-        df = pd.read_excel(self.path, sheet_name=self.sheet_name, engine="openpyxl")
+        # Read the sheet, parsing only the identity + metric columns we keep
+        wanted = {self.COL_PE_NAME, self.COL_AE_NAME, self.COL_AE_ID, self.COL_STATUS,
+                  self.COL_UV, self.COL_YEAR, *self.PROD_MAP}
+        df = cached_parquet(
+            self.path,
+            lambda: pd.read_excel(self.path, sheet_name=self.sheet_name, engine=self.engine,
+                                  usecols=lambda c: c in wanted),
+            "p1_ae", self.sheet_name, *sorted(wanted),
+        )
 
         # Split Uncertainty/Valuation like in TSE
         if self.COL_UV in df.columns:
@@ -120,39 +138,27 @@ class LoaderP1AE:
         if self.COL_YEAR in df.columns:
             df["YearOnly"] = self._year_only(df[self.COL_YEAR])
 
-        # Pick identity/descriptor columns (keep if present)
-        id_cols = [c for c in [self.COL_PE_NAME, self.COL_AE_NAME, self.COL_AE_ID, self.COL_STATUS,
-                               self.COL_YEAR, "YearOnly", "UNCERTAINTY", "VALUATION"]
-                   if c in df.columns]
-
-        # Build the production selection using header → canonical mapping
-        prod_existing = {k: v for k, v in self.PROD_MAP.items() if k in df.columns}
-        prod_cols_raw = list(prod_existing.keys())
-
-        # Subset + rename
-        keep_cols = id_cols + prod_cols_raw
-        df = df.loc[:, keep_cols].copy()
-        df = df.rename(columns=prod_existing)
-
-        # Coerce numeric on metric columns
-        metric_cols = list(prod_existing.values())
-        df = self._to_numeric(df, metric_cols)
-
-        # Rename ID columns to canonical uppercase (optional, consistent with TSE style)
-        rename_ids = {
+        # Output columns in final order (source header → canonical name):
+        # IDs, status, UV fields, year fields, then metrics
+        out_map = {
             self.COL_PE_NAME: "PE_NAME",
             self.COL_AE_NAME: "ACTIVITY_ENTITY_NAME",
             self.COL_AE_ID: "ACTIVITY_ENTITY_ID",
             self.COL_STATUS: "STATUS",
+            "UNCERTAINTY": "UNCERTAINTY",
+            "VALUATION": "VALUATION",
             self.COL_YEAR: "YEAR",
+            "YearOnly": "YearOnly",
+            **self.PROD_MAP,
         }
-        df = df.rename(columns={k: v for k, v in rename_ids.items() if k in df.columns})
+        present = set(df.columns)
+        metric_cols = [v for k, v in self.PROD_MAP.items() if k in present]
 
-        # Final ordering: IDs, status, UV fields, year fields, then metrics
-        ordered = [c for c in ["PE_NAME", "ACTIVITY_ENTITY_NAME", "ACTIVITY_ENTITY_ID",
-                               "STATUS", "UNCERTAINTY", "VALUATION", "YEAR", "YearOnly"]
-                   if c in df.columns] + metric_cols
-        df = df.loc[:, ordered]
+        # One constructor from the column arrays: no subset copy, rename or reorder passes
+        df = pd.DataFrame({new: df[raw] for raw, new in out_map.items() if raw in present})
+
+        # Coerce numeric on metric columns
+        df = self._to_numeric(df, metric_cols)
 
         self.df_p1_ae = df
         return self.df_p1_ae
@@ -1,4 +1,8 @@
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from src.core.utils import cached_parquet, resolve_excel_engine, strip_float_suffix
 
 class LoaderP1Hierarchy:
     """
@@ -37,19 +41,20 @@ class LoaderP1Hierarchy:
     }
 
     # >>> NEW: labels we expect to see in a promoted header row
-    _HEADER_CANDIDATES = {
+    _HEADER_CANDIDATES = frozenset({
         "activity entity", "activity entity id",
         "technical entity", "technical entity id",
         "technical sub entity", "technical sub entity id",
         "technical sub-entity", "technical sub-entity id",
         "technical_sub_entity", "technical_sub_entity id",
         "tse id",
-    }
+    })
     # <<< NEW
 
-    def __init__(self, path: str, sheet_name: str | int | None = 0):
+    def __init__(self, path: str, sheet_name: str | int | None = 0, engine: str = "calamine"):
         self.path = path
         self.sheet_name = sheet_name  # 0 = first sheet by default
+        self.engine = resolve_excel_engine(engine)
 
     # >>> NEW
     @staticmethod
@@ -67,26 +72,25 @@ class LoaderP1Hierarchy:
 
         cols = [str(c) for c in df.columns]
         unnamed_ratio = sum(c.lower().startswith("unnamed") for c in cols) / max(len(cols), 1)
-        have_key_in_cols = any(
-            any(lbl in c.strip().lower() for lbl in LoaderP1Hierarchy._HEADER_CANDIDATES)
-            for c in cols
+        norm_cols = {c.strip().lower() for c in cols}
+        # Exact label match is the common case; only fall back to the substring scan when it misses
+        have_key_in_cols = bool(norm_cols & LoaderP1Hierarchy._HEADER_CANDIDATES) or any(
+            lbl in c for lbl in LoaderP1Hierarchy._HEADER_CANDIDATES for c in norm_cols
         )
         if have_key_in_cols and unnamed_ratio < 0.4:
             # Looks fine; nothing to promote
             return df
 
-        # Scan first few rows for a plausible header record
+        # Scan first few rows for a plausible header record (one isin over the head block)
         scan_n = min(8, len(df))
-        best_row_idx = None
-        best_score = -1
-        for i in range(scan_n):
-            row_vals = df.iloc[i].astype(str).str.strip().str.lower().tolist()
-            score = sum(1 for v in row_vals if v in LoaderP1Hierarchy._HEADER_CANDIDATES)
-            if score > best_score:
-                best_score = score
-                best_row_idx = i
-
-        if best_row_idx is not None and best_score >= 3:
+        head = df.head(scan_n).astype(str)
+        scores = head.apply(
+            lambda c: c.str.strip().str.lower().isin(LoaderP1Hierarchy._HEADER_CANDIDATES)
+        ).sum(axis=1).to_numpy()
+        best_row_idx = int(scores.argmax())  # first row wins ties, as before
+        best_score = int(scores[best_row_idx])
+
+        if best_score >= 3:
             # Promote this row to header
             new_cols = df.iloc[best_row_idx].astype(str).str.strip().tolist()
             df = df.iloc[best_row_idx + 1 :].copy()
@@ -100,30 +104,46 @@ class LoaderP1Hierarchy:
         return df
     # <<< NEW
 
+    @staticmethod
+    def _normalize_id(col: pd.Series) -> pd.Series:
+        """
+        ID column -> trimmed strings without a trailing '.0'; missing -> pd.NA.
+        Whole-number numeric columns (IDs read as float) go through Int64 instead of string ops.
+        """
+        if is_numeric_dtype(col) and not is_bool_dtype(col):
+            vals = col.to_numpy(dtype="float64", na_value=np.nan)
+            vals = vals[~np.isnan(vals)]
+            # inf / codes beyond int64 cannot go through Int64; the string path handles them
+            if (np.isfinite(vals).all() and (np.abs(vals) < 2**63).all()
+                    and (vals == np.floor(vals)).all()):
+                return col.astype("Int64").astype(str).where(col.notna())
+        return strip_float_suffix(col.astype(str).str.strip()).replace({"nan": pd.NA})
+
     def load(self) -> pd.DataFrame:
         # Use first sheet when sheet_name is None, empty, or the string "None"
         sheet = 0 if self.sheet_name in (None, "", "None") else self.sheet_name
 
-        df = pd.read_excel(self.path, engine="openpyxl", sheet_name=sheet)
+        df = cached_parquet(
+            self.path,
+            lambda: pd.read_excel(self.path, engine=self.engine, sheet_name=sheet),
+            "p1_hier", sheet,
+        )
 
         # If someone passed sheet=None, pick the first from dict
         if isinstance(df, dict):
             df = next(iter(df.values()))
 
-        # Drop completely empty columns/rows
-        df = df.dropna(axis=1, how="all").dropna(axis=0, how="all")
+        # Drop completely empty columns/rows (one null mask, reduced both ways in NumPy)
+        notna = df.notna().to_numpy()
+        df = df.iloc[notna.any(axis=1), notna.any(axis=0)]
 
         # >>> NEW: try to promote real header row if needed
         df = self._maybe_promote_header_row(df)
         # <<< NEW
 
-        # Normalize column names via _COL_MAP
-        rename_map = {}
-        for c in df.columns:
-            key = str(c).strip().lower().replace("\n", " ")
-            rename_map[c] = self._COL_MAP.get(key, None)
-
-        mapped = {orig: new for orig, new in rename_map.items() if new}
+        # Normalize column names via _COL_MAP (one pass over the header Index)
+        keys = df.columns.astype(str).str.strip().str.lower().str.replace("\n", " ", regex=False)
+        mapped = {orig: new for orig, new in zip(df.columns, keys.map(self._COL_MAP)) if isinstance(new, str)}
         df = df.rename(columns=mapped)
 
         # Trim strings for key text columns
@@ -145,12 +165,7 @@ class LoaderP1Hierarchy:
             "R1_OBJECTIVE_ID",
         ]:
             if col in df.columns:
-                df[col] = (
-                    df[col].astype(str)
-                           .str.strip()
-                           .str.replace(r"\.0$", "", regex=True)
-                           .replace({"nan": pd.NA})
-                )
+                df[col] = self._normalize_id(df[col])
 
         # Keep only rows that have at least a TSE or AE/TE data
         essential_cols = [
@@ -158,8 +173,10 @@ class LoaderP1Hierarchy:
             "TECHNICAL_ENTITY_ID",
             "TECHNICAL_SUB_ENTITY_ID",
         ]
-        if any(c in df.columns for c in essential_cols):
-            df = df.dropna(subset=[c for c in essential_cols if c in df.columns], how="all")
+        present = set(df.columns)
+        essential_present = [c for c in essential_cols if c in present]
+        if essential_present:
+            df = df.dropna(subset=essential_present, how="all")
 
         # Reorder preferred columns first
         prefer = [
@@ -168,7 +185,8 @@ class LoaderP1Hierarchy:
             "TECHNICAL_SUB_ENTITY_NAME", "TECHNICAL_SUB_ENTITY_ID",
             "R1_OBJECTIVE_NAME", "R1_OBJECTIVE_ID",
         ]
-        ordered = [c for c in prefer if c in df.columns] + [c for c in df.columns if c not in prefer]
+        prefer_set = set(prefer)
+        ordered = [c for c in prefer if c in present] + [c for c in df.columns if c not in prefer_set]
         df = df.loc[:, ordered]
 
         return df
\ No newline at end of file
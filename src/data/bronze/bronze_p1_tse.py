@@ -1,7 +1,26 @@
 import pandas as pd
+import numpy as np
+import calendar
 import os
 import re
 
+from config.settings import DAYS_IN_YEAR, QC_DEBUG
+from src.core.utils import categorize, resolve_excel_engine, strip_float_suffix, to_arrow_strings
+
+
+# Production metric header after the 'NN. ' prefix, e.g. 'Oil AfS - 100% tr - rate'
+METRIC_RE = re.compile(
+    r'^(?P<PRODUCT>\S+) (?P<PRODUCT_STREAM>\S+) - (?P<EQUITY_SHARE>[^-]+?) (?P<CUT_OFF>[^-]+?) - (?P<TYPE>.+)$'
+)
+
+# Production column headers '01.' .. '22.'
+PROD_COL_RE = re.compile(r'^(0[1-9]|1\d|2[0-2])\.')
+
+
+def _days_in_year(year: int) -> int:
+    """Days in `year`, served from DAYS_IN_YEAR with a calendar fallback outside its range."""
+    return DAYS_IN_YEAR.get(year) or (366 if calendar.isleap(year) else 365)
+
 
 class LoaderP1TSE:
     """
@@ -10,119 +29,130 @@ class LoaderP1TSE:
     Columns I–AP: Production data (transposed).
     """
 
-    def __init__(self, file_path: str):
+    # 'Uncertainty/Valuation' literals that do not follow the '<UNCERTAINTY> <VALUATION>' form
+    _UV_SPECIAL = {
+        'Low': ('Low', 'PR'),
+        'High': ('High', 'PR'),
+        'SEC': ('Low', 'YAP'),
+    }
+
+    # Header spellings accepted for the TSE name column
+    _NAME_COLS = ('TSE name', 'TSE Name', 'TSE NAME',
+                  'TECHNICAL SUB ENTITY NAME', 'TECHNICAL_SUB_ENTITY_NAME')
+
+    # Non-production columns the loader reads; everything else except '01.'..'22.' is skipped at parse time
+    _META_COLS = frozenset({
+        'TSE ID', 'TECHNICAL_SUB_ENTITY_ID', *_NAME_COLS,
+        'Uncertainty/Valuation', 'UNCERTAINTY', 'VALUATION', 'Year',
+    })
+
+    def __init__(self, file_path: str, engine: str = 'calamine'):
         self.file_path = file_path
+        self.engine = resolve_excel_engine(engine)
         self.df_raw = None
         self.df_transposed = None
+        self.df_production = None
 
     def load_p1tse(self) -> pd.DataFrame:
         print(f"📂 Loading data from: {self.file_path}")
-        df = pd.read_excel(self.file_path)
+        # 'Year' mixes '2025 01' text with bare numbers and is only ever sliced as text: read it as str
+        df = to_arrow_strings(pd.read_excel(self.file_path, engine=self.engine,
+                                            usecols=self._keep_column, dtype={'Year': str}))
         
 
         if 'TSE ID' in df.columns and 'TECHNICAL_SUB_ENTITY_ID' not in df.columns:
-            df['TECHNICAL_SUB_ENTITY_ID'] = (
-                df['TSE ID'].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
-            )
+            df['TECHNICAL_SUB_ENTITY_ID'] = strip_float_suffix(df['TSE ID'].astype(str).str.strip())
 
         # Normalize Name (try common header spellings)
-        possible_name_cols = ['TSE name', 'TSE Name', 'TSE NAME',
-                            'TECHNICAL SUB ENTITY NAME', 'TECHNICAL_SUB_ENTITY_NAME']
-        name_col_found = next((c for c in possible_name_cols if c in df.columns), None)
+        name_col_found = next((c for c in self._NAME_COLS if c in df.columns), None)
         df['TECHNICAL_SUB_ENTITY_NAME'] = (
             df[name_col_found].astype(str).str.strip() if name_col_found else pd.NA
         )
 
 
         if 'Uncertainty/Valuation' in df.columns:
-            # FIX: Better handling of Uncertainty/Valuation splitting
-            def split_uncertainty_valuation(value):
-                if pd.isna(value):
-                    return pd.Series(['', ''])
-                value_str = str(value).strip()
-                if value_str == 'Low':
-                    return pd.Series(['Low', 'PR'])
-                elif value_str == 'High':
-                    return pd.Series(['High', 'PR'])
-                elif value_str == 'SEC':
-                    return pd.Series(['Low', 'YAP'])
-                elif ' ' in value_str:
-                    parts = value_str.split(' ', 1)
-                    return pd.Series([parts[0], parts[1]])
-                else:
-                    return pd.Series([value_str, ''])
-            
-            split_results = df['Uncertainty/Valuation'].apply(split_uncertainty_valuation)
-            df[['UNCERTAINTY', 'VALUATION']] = split_results
+            # Vectorized split: special literals via lookup, otherwise split on the first space
+            uv = df['Uncertainty/Valuation'].astype('string').str.strip()
+            parts = uv.str.split(' ', n=1, expand=True).reindex(columns=[0, 1])
+            special = uv.isin(list(self._UV_SPECIAL))
+            df['UNCERTAINTY'] = (
+                parts[0].mask(special, uv.map({k: v[0] for k, v in self._UV_SPECIAL.items()}))
+                .fillna('').astype(object).infer_objects()
+            )
+            df['VALUATION'] = (
+                parts[1].mask(special, uv.map({k: v[1] for k, v in self._UV_SPECIAL.items()}))
+                .fillna('').astype(object).infer_objects()
+            )
             df.drop(columns=['Uncertainty/Valuation'], inplace=True)
-            
+
             # Debug output to check the splitting
-            print(f"🔍 UNCERTAINTY values after splitting: {df['UNCERTAINTY'].unique()}")
-            print(f"🔍 VALUATION values after splitting: {df['VALUATION'].unique()}")
+            if QC_DEBUG:
+                print(f"🔍 UNCERTAINTY values after splitting: {df['UNCERTAINTY'].unique()}")
+                print(f"🔍 VALUATION values after splitting: {df['VALUATION'].unique()}")
             
-        df['YearOnly'] = df['Year'].astype(str).str.extract(r'(\d{4})')[0]
+        df['YearOnly'] = self._year_only(df['Year'])
         self.df_transposed = df
+        self.df_production = None  # fresh sheet: rebuild production on the next extract
         return self.df_transposed
 
-    def _parse_production_metric(self, metric_string):
-        try:
-            # Remove first 4 characters
-            remaining = metric_string[4:]
-            
-            # Split into components
-            parts = remaining.split()
-            
-            # Extract components according to the pattern
-            product = parts[0].upper() if len(parts) > 0 else ""
-            product_stream = parts[1].upper() if len(parts) > 1 else ""
-            
-            # Join remaining parts and look for the pattern
-            remaining_str = ' '.join(parts[2:]) if len(parts) > 2 else ""
-            
-            # More robust parsing using regex to handle the pattern
-            pattern = r'^-\s+([^-]+?)\s+([^-]+?)\s+-\s+(.+)$'
-            match = re.search(pattern, remaining_str)
-            
-            if match:
-                equity_share = match.group(1).replace('%', '').strip()
-                cut_off = match.group(2).replace('tr', 'Applied').replace('unt', 'Not Applied').strip()
-                metric_type = match.group(3).strip()
-            else:
-                # Fallback: try simpler parsing
-                stream_parts = remaining_str.split(' - ')
-                if len(stream_parts) >= 3:
-                    first_part = stream_parts[0].strip()
-                    # Split first part to separate product_stream and cut_off
-                    first_parts = first_part.split()
-                    if len(first_parts) >= 2:
-                        product_stream = first_parts[0]
-                        cut_off = first_parts[1]
-                    else:
-                        product_stream = first_part
-                        cut_off = ""
-                    metric_type = stream_parts[2].strip()
-                else:
-                    product_stream = ""
-                    cut_off = ""
-                    metric_type = remaining_str
-            
-            return {
-                'PRODUCT': product,
-                'EQUITY_SHARE': equity_share,
-                'PRODUCT_STREAM': product_stream,
-                'CUT_OFF': cut_off,
-                'TYPE': metric_type
-            }
-            
-        except Exception as e:
-            print(f"Warning: Could not parse metric string: {metric_string}. Error: {e}")
-            return {
-                'PRODUCT': "",
-                'EQUITY_SHARE': "",
-                'PRODUCT_STREAM': "",
-                'CUT_OFF': "",
-                'TYPE': ""
-            }
+    @classmethod
+    def _keep_column(cls, col) -> bool:
+        """usecols filter: metadata plus non-ratio production columns."""
+        col = str(col)
+        return col in cls._META_COLS or (PROD_COL_RE.match(col) is not None and 'ratio' not in col.lower())
+
+    @staticmethod
+    def _year_only(year: pd.Series) -> pd.Series:
+        """
+        4-digit year as text ('2025') from the 'Year' column.
+        Datetimes use .dt; text takes the first 4 chars, and only rows where those
+        are not a year fall back to the regex search.
+        """
+        if pd.api.types.is_datetime64_any_dtype(year):
+            return year.dt.strftime('%Y')
+        text = year.astype(str)
+        out = text.str[:4]
+        ok = out.str.isdigit() & (out.str.len() == 4)
+        if not ok.all():
+            out = out.where(ok, text[~ok].str.extract(r'(\d{4})')[0])
+        return out
+
+    @staticmethod
+    def _parse_production_metrics(metrics: pd.Series) -> pd.DataFrame:
+        """
+        Split Production_Metric headers (e.g. '01. Oil AfS - 100% tr - rate') into
+        PRODUCT / EQUITY_SHARE / PRODUCT_STREAM / CUT_OFF / TYPE in one regex pass.
+        Headers that do not follow the pattern get empty strings in every field.
+        Each distinct header is parsed once and broadcast back to the rows.
+        """
+        codes, uniques = pd.factorize(metrics, use_na_sentinel=False)
+        uniques = pd.Series(uniques)
+
+        # Drop the 'NN. ' prefix and collapse whitespace so METRIC_RE can use single spaces
+        normalized = (
+            uniques.astype(str).str[4:]
+            .str.strip()
+            .str.replace(r'\s+', ' ', regex=True)
+        )
+        parts = normalized.str.extract(METRIC_RE)
+
+        unparsed = uniques[parts['TYPE'].isna()]
+        if len(unparsed):
+            print(f"Warning: Could not parse metric strings: {list(unparsed)}")
+
+        parts = parts.take(codes).set_axis(metrics.index)
+        out = pd.DataFrame(index=metrics.index)
+        out['PRODUCT'] = parts['PRODUCT'].str.upper()
+        out['EQUITY_SHARE'] = parts['EQUITY_SHARE'].str.replace('%', '', regex=False).str.strip()
+        out['PRODUCT_STREAM'] = parts['PRODUCT_STREAM'].str.upper()
+        out['CUT_OFF'] = (
+            parts['CUT_OFF']
+            .str.replace('tr', 'Applied', regex=False)
+            .str.replace('unt', 'Not Applied', regex=False)
+            .str.strip()
+        )
+        out['TYPE'] = parts['TYPE'].str.strip()
+        return out.fillna('')
 
 
     def extract_production_data(self) -> pd.DataFrame:
@@ -134,30 +164,30 @@ class LoaderP1TSE:
 
         Steps:
         1) Identify production columns (01. .. 22.)
-        2) Melt wide -> long with ID + NAME kept in id_vars
-        3) Aggregate to annual (average if multiple months, else keep as-is)
+        2) Aggregate months to annual on the wide frame (average if multiple months, else keep as-is)
+        3) Melt the annual rows wide -> long with ID + NAME kept in id_vars
         4) Pivot years to columns
         5) Parse Production_Metric into PRODUCT / STREAM / EQUITY / CUT_OFF / TYPE
         6) Multiply by days in year
         7) Return tidy dataframe with ID + NAME + attributes + years
         """
+        if self.df_production is not None:
+            return self.df_production
         if self.df_transposed is None:
             self.load_p1tse()
 
-        df = self.df_transposed.copy()
-
-        # Ensure normalized TECHNICAL_SUB_ENTITY_ID exists (fallback from 'TSE ID')
-        if 'TECHNICAL_SUB_ENTITY_ID' not in df.columns and 'TSE ID' in df.columns:
-            df['TECHNICAL_SUB_ENTITY_ID'] = (
-                df['TSE ID'].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
-            )
+        # TECHNICAL_SUB_ENTITY_ID is normalized once in load_p1tse.
+        # Read-only from here on (melt builds a new frame), so no defensive copy.
+        df = self.df_transposed
 
         # --- Identify production columns (e.g. '01. Cond ...' to '22. Gas ...') ---
-        production_columns = []
-        for i in range(1, 23):
-            pattern = f"^{i:02d}\\."
-            matching_cols = [col for col in df.columns if re.match(pattern, str(col))]
-            production_columns.extend(matching_cols)
+        # One regex pass; stable sort keeps the 01 → 22 grouping (sheet order within a prefix).
+        # Ratio columns are dropped here so the melt never produces their rows.
+        production_columns = sorted(
+            (col for col in df.columns
+             if PROD_COL_RE.match(str(col)) and 'ratio' not in str(col).lower()),
+            key=lambda col: int(str(col)[:2]),
+        )
 
         if not production_columns:
             print("❌ No production columns found matching the pattern '01.' to '22.'")
@@ -178,51 +208,44 @@ class LoaderP1TSE:
             print(f"⚠️  Warning: Missing metadata columns: {missing_metadata}")
         metadata_cols = [c for c in metadata_cols if c in df.columns]
 
-        # --- Melt to long ---
-        df_melted = pd.melt(
-            df,
-            id_vars=metadata_cols,
-            value_vars=production_columns,
-            var_name='Production_Metric',
-            value_name='Value'
-        )
+        # --- Aggregate months to annual on the wide frame (one row per TSE/scenario/month) ---
+        # Project to the needed columns first; the sheet carries many more
+        df_wide = df.loc[:, metadata_cols + (['YearOnly'] if 'YearOnly' in df.columns else []) + production_columns]
+        df_wide[production_columns] = df_wide[production_columns].apply(pd.to_numeric, errors='coerce')
 
-        # Remove ratio rows and cast to numeric
-        df_melted = df_melted[~df_melted['Production_Metric'].str.contains('ratio', case=False, na=False)]
-        df_melted['Value'] = pd.to_numeric(df_melted['Value'], errors='coerce')
+        # --- 4-digit year: computed once in load_p1tse ---
+        if 'YearOnly' not in df_wide.columns:
+            df_wide['YearOnly'] = self._year_only(df_wide['Year'])
 
-        # --- Extract 4-digit year from 'Year' ---
-        df_melted['YearOnly'] = df_melted['Year'].astype(str).str.extract(r'(\d{4})')[0]
+        df_wide, restore_keys = categorize(df_wide, ['TECHNICAL_SUB_ENTITY_ID', 'TECHNICAL_SUB_ENTITY_NAME',
+                                                     'UNCERTAINTY', 'VALUATION', 'YearOnly'])
 
-        # --- Aggregate to annual (month-aware averaging) ---
         group_keys = [c for c in [
             'TECHNICAL_SUB_ENTITY_ID',
             'TECHNICAL_SUB_ENTITY_NAME',
             'TSE ID',
             'UNCERTAINTY',
             'VALUATION',
-            'Production_Metric',
             'YearOnly'
-        ] if c in df_melted.columns]
+        ] if c in df_wide.columns]
 
-        counts = (
-            df_melted
-            .groupby(group_keys)
-            .size()
-            .reset_index(name='MonthCount')
-        )
+        # Every metric of a group shares the same month rows, so one size() serves all columns;
+        # the pivot below sorts its index, so the groupby output order does not matter
+        grouped = df_wide.groupby(group_keys, observed=True, sort=False)
+        month_count = grouped.size()
 
-        df_annual = (
-            df_melted
-            .groupby(group_keys, as_index=False)
-            .agg({'Value': 'sum'})
-            .merge(counts, on=group_keys, how='left')
-        )
+        # Average multi-month years; single-month (or empty) groups keep their value
+        df_annual = grouped[production_columns].sum().div(month_count.clip(lower=1), axis=0)
 
-        df_annual['Value'] = df_annual.apply(
-            lambda r: r['Value'] / r['MonthCount'] if r['MonthCount'] and r['MonthCount'] > 1 else r['Value'],
-            axis=1
+        # --- Long by metric: melt the annual rows (K x fewer than the monthly ones) ---
+        df_annual = pd.melt(
+            df_annual.reset_index(),
+            id_vars=group_keys,
+            value_vars=production_columns,
+            var_name='Production_Metric',
+            value_name='Value'
         )
+        df_annual['Production_Metric'] = df_annual['Production_Metric'].astype('category')
 
         # --- Pivot years to columns (keep ID + NAME in index) ---
         index_cols = [c for c in [
@@ -234,33 +257,23 @@ class LoaderP1TSE:
             'Production_Metric'
         ] if c in df_annual.columns]
 
+        # (index_cols, YearOnly) is unique after the groupby: a plain reshape, no second aggregation
         df_pivoted = (
             df_annual
-            .pivot_table(index=index_cols, columns='YearOnly', values='Value')
+            .pivot(index=index_cols, columns='YearOnly', values='Value')
             .reset_index()
         )
 
         # --- Parse Production_Metric into structured fields ---
-        metric_components = df_pivoted['Production_Metric'].apply(self._parse_production_metric)
-        df_pivoted['PRODUCT']        = metric_components.apply(lambda x: x.get('PRODUCT', ''))
-        df_pivoted['EQUITY_SHARE']   = metric_components.apply(lambda x: x.get('EQUITY_SHARE', ''))
-        df_pivoted['PRODUCT_STREAM'] = metric_components.apply(lambda x: x.get('PRODUCT_STREAM', ''))
-        df_pivoted['CUT_OFF']        = metric_components.apply(lambda x: x.get('CUT_OFF', ''))
-        df_pivoted['TYPE']           = metric_components.apply(lambda x: x.get('TYPE', ''))
-
-        # --- Multiply by number of days in year ---
-        def get_days_in_year(year):
-            try:
-                y = int(year)
-                return 366 if ((y % 4 == 0 and y % 100 != 0) or (y % 400 == 0)) else 365
-            except (ValueError, TypeError):
-                print(f"Warning: Invalid year '{year}', using 365 days as default")
-                return 365
+        metric_components = self._parse_production_metrics(df_pivoted['Production_Metric'])
+        df_pivoted[metric_components.columns] = metric_components
 
+        # --- Multiply by number of days in year (one block multiply) ---
         # Strictly treat only 4-digit columns as year columns
         year_columns = [c for c in df_pivoted.columns if str(c).isdigit()]
-        for y in year_columns:
-            df_pivoted[y] = df_pivoted[y] * get_days_in_year(y)
+        if year_columns:
+            days = np.array([_days_in_year(int(y)) for y in year_columns], dtype='float64')
+            df_pivoted[year_columns] = df_pivoted[year_columns].to_numpy(dtype='float64') * days
 
         # --- Final tidy selection ---
         final_columns = [
@@ -271,7 +284,9 @@ class LoaderP1TSE:
         ] + year_columns
 
         df_final = df_pivoted[[c for c in final_columns if c in df_pivoted.columns]].copy()
-        print(df_final.head())
+        df_final = restore_keys(df_final)
+        if QC_DEBUG:
+            print(df_final.head())
         self.df_production = df_final
         return self.df_production
 
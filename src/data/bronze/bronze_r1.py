@@ -3,6 +3,14 @@ import numpy as np
 from typing import Optional, List
 from datetime import datetime
 import os
+import re
+from functools import lru_cache
+
+from config.settings import QC_DEBUG, R1_YEAR_DTYPE
+from src.core.utils import cached_parquet, categorize, group_sum, strip_float_suffix, to_arrow_strings
+
+# CURRENT_YEAR -> 0, CURRENT_YEAR_<n> -> n
+CY_RE = re.compile(r'^CURRENT_YEAR(?:_(\d+))?$')
 
 
 class R1Loader:
@@ -26,14 +34,19 @@ class R1Loader:
 
     def load_data(self) -> pd.DataFrame:
         print(f"📂 Loading data from: {self.file_path}")
-        df = pd.read_csv(self.file_path)
+        # 1) Header only (cheap), then parse just the fixed + CURRENT_YEAR* columns
+        header = list(pd.read_csv(self.file_path, nrows=0).columns)
+        usecols = [c for c in header if c in self.fixed_columns or c.startswith("CURRENT_YEAR")]
+        df = to_arrow_strings(
+            cached_parquet(self.file_path, lambda: self._read_csv(usecols), "r1-text", R1_YEAR_DTYPE, *usecols)
+        )
         
         # 2) Diagnostics for the columns that threw DtypeWarning by index
         mixed_idx = [61, 62, 63, 64, 65, 66, 68, 70, 81, 87, 93, 108, 111, 112]
-        mixed_idx = [i for i in mixed_idx if i < len(df.columns)]
-        mixed_cols = [df.columns[i] for i in mixed_idx]
+        mixed_idx = [i for i in mixed_idx if i < len(header)]
+        mixed_cols = [header[i] for i in mixed_idx]
 
-        if mixed_cols:
+        if QC_DEBUG and mixed_cols:
             print("🔎 Columns with mixed types (by index):", mixed_idx)
             print("🔎 Column names:", mixed_cols)
             print("\n🔎 Inferred dtypes for these columns:")
@@ -47,27 +60,41 @@ class R1Loader:
         rename_map = {col: str(base_year + i) for i, col in enumerate(self.production_columns)}
         df = df.rename(columns=rename_map)
         all_columns = self.fixed_columns + list(rename_map.values())
-        all_columns = [col for col in all_columns if col in df.columns]
+        present = set(df.columns)
+        all_columns = [col for col in all_columns if col in present]
         df['TECHNICAL_SUB_ENTITY_ID'] = (
-            df['TECHNICAL_SUB_ENTITY_ID']
-            .astype(str).str.strip()
-            .str.replace(r'\.0$', '', regex=True)
-            .replace({'nan': pd.NA})
+            strip_float_suffix(df['TECHNICAL_SUB_ENTITY_ID'].astype(str).str.strip()).replace({'nan': pd.NA})
         )
-        self.df = df[all_columns].copy()
+        self.df = df[all_columns]  # list selection already returns a new frame
         print(f"✅ Loaded {len(self.df)} rows and {len(all_columns)} columns.")
         return self.df
 
+    def _read_csv(self, usecols: List[str]) -> pd.DataFrame:
+        """Multithreaded Arrow CSV reader when pyarrow is installed, else pandas' C parser."""
+        # Only the CURRENT_YEAR* columns are type-inferred; everything else is read as text,
+        # so both engines agree (Arrow would otherwise turn ISO cut-off dates into dates).
+        # Year columns are parsed straight into R1_YEAR_DTYPE when it is narrowed (opt-in);
+        # the float64 default keeps the parser's own inference
+        dtype = {c: str for c in usecols if not c.startswith("CURRENT_YEAR")}
+        if R1_YEAR_DTYPE != "float64":
+            dtype.update({c: R1_YEAR_DTYPE for c in usecols if c.startswith("CURRENT_YEAR")})
+        try:
+            return pd.read_csv(self.file_path, usecols=usecols, dtype=dtype, engine="pyarrow")
+        except ImportError:
+            pass
+        except Exception as e:
+            print(f"⚠️ pyarrow CSV engine failed ({e}); falling back to the C parser")
+        return pd.read_csv(self.file_path, usecols=usecols, dtype=dtype)
+
     @staticmethod
-    def _sort_production_columns(col: str) -> int:
+    @lru_cache(maxsize=1024)
+    def _sort_production_columns(col: str) -> float:
         """Helper to sort production columns logically (CURRENT_YEAR, CURRENT_YEAR_1, etc.)."""
-        if col == "CURRENT_YEAR":
-            return 0
-        try:
-            return int(col.split("_")[-1])
-        except ValueError:
+        m = CY_RE.match(col)
+        if m is None:
             return float("inf")
-        
+        return int(m.group(1) or 0)
+
     def create_project_hierarchy(self) -> pd.DataFrame:
         """
         Create a project hierarchy DataFrame with unique OBJECTIVE_IDs.
@@ -115,15 +142,18 @@ class R1Loader:
         cols_to_keep = group_cols + ['UNITS'] + year_cols
         existing_cols = [col for col in cols_to_keep if col in self.df.columns]
         
-        df_temp = self.df[existing_cols].copy()
-        df_temp[year_cols] = df_temp[year_cols].fillna(0)
         # Aggregate by unique combination (sum production)
-        df_grouped = (
-            df_temp
-            .groupby(group_cols + ['UNITS'], dropna=False)[year_cols]
-            .sum()
-            .reset_index()
-        )
+        key_cols = [c for c in group_cols + ['UNITS'] if c in existing_cols]
+        df_temp, restore_keys = categorize(self.df[existing_cols], key_cols)
+        grouped = df_temp.groupby(key_cols, dropna=False, observed=True)
+        codes = grouped.ngroup().to_numpy()
+
+        # Years as one 2-D float block: NaN -> 0 in place (was fillna(0)), then one
+        # row-wise reduceat over the group-sorted rows instead of a per-column sum
+        values = np.nan_to_num(df_temp[year_cols].to_numpy(dtype=R1_YEAR_DTYPE, copy=True), copy=False)
+        sums = group_sum(codes, values)
+        df_grouped = pd.DataFrame(sums, columns=year_cols, index=grouped.size().index).reset_index()
+        df_grouped = restore_keys(df_grouped)
 
         self.df_production = df_grouped
         print(f"⚙️ Created production DataFrame with {len(df_grouped)} unique combinations.")
@@ -153,5 +183,11 @@ if __name__ == "__main__":
     print(df_hierarchy.head())
     print("\n--- Production Data ---")
     print(df_production.head())
-    df_production.to_csv(r"debug_outputs\testr1.csv")
+    # Dump only when asked (settings.QC_DEBUG); Parquet skips the per-row CSV formatting
+    if QC_DEBUG:
+        os.makedirs("debug_outputs", exist_ok=True)
+        try:
+            df_production.to_parquet(os.path.join("debug_outputs", "testr1.parquet"), compression="zstd")
+        except ImportError:
+            df_production.to_csv(os.path.join("debug_outputs", "testr1.csv"))
 
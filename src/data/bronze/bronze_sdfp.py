@@ -1,9 +1,10 @@
 import pandas as pd
 import re
-from io import StringIO
 from pathlib import Path
 from typing import Tuple
 
+from src.core.utils import cached_parquet, categorize, to_arrow_strings
+
 # ---------- CONFIG ----------
 ITEM_TO_META = {
     "Production Oil": ("OIL", 100, "AFS"),
@@ -14,6 +15,11 @@ ITEM_TO_META = {
     "Injection Gas":  ("GAS", 100, "INJ"),
     "Imported / Exported Gas": ("GAS", 100, "IMP"),
 }
+# One flat lookup per output column (replaces per-row tuple indexing)
+META_MAPS = {
+    col: {item: meta[i] for item, meta in ITEM_TO_META.items()}
+    for i, col in enumerate(["PRODUCT", "EQUITY_SHARE", "PRODUCT_STREAM"])
+}
 
 BASE_ITEM_REGEX = r"^(Production Oil|Production Gas|Fuel Gas|Flare Gas|Injection Gas|Imported / Exported Gas)"
 def _file_tags_to_flags(file_path: str | Path) -> tuple[str, str]:
@@ -40,12 +46,22 @@ def load_bronze(file_path: str | Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
       bronze_wide: wide bronze table with years as columns
       bronze_long: long bronze table with Year/Value
     """
-    # --- 1) Load CSV robustly (strip leading whitespace/BOM) ---
+    # --- 1) Load CSV robustly (strip leading whitespace/BOM), via the Parquet cache ---
     p = Path(file_path)
-    with open(p, "r", encoding="utf-8") as f:
-        raw = f.read().lstrip()
-    df = pd.read_csv(StringIO(raw))
-    df.columns = [c.strip() for c in df.columns]
+
+    def _read_csv() -> pd.DataFrame:
+        with open(p, "r", encoding="utf-8") as f:
+            # Skip leading whitespace in place and let pandas stream the rest,
+            # instead of buffering the whole file as a string first
+            pos = f.tell()
+            while (ch := f.read(1)) and ch.isspace():
+                pos = f.tell()
+            f.seek(pos)
+            df = pd.read_csv(f)
+        df.columns = [c.strip() for c in df.columns]
+        return df
+
+    df = to_arrow_strings(cached_parquet(p, _read_csv, "sdfp"))
 
     # --- 2) Identify all year columns dynamically (YYYY) ---
     year_cols = sorted([c for c in df.columns if re.fullmatch(r"\d{4}", str(c))], key=int)
@@ -60,43 +76,29 @@ def load_bronze(file_path: str | Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
     df["BASE_ITEM"] = df["Item 1"].astype(str).str.extract(BASE_ITEM_REGEX)
     df = df.loc[df["BASE_ITEM"].notna()].copy()
 
-    # --- 5) Long form for aggregation ---
-    id_cols = ["Units", "TSE ID", "TSE Name", "BASE_ITEM"]
-    long_df = df[id_cols + year_cols].melt(id_vars=id_cols, var_name="Year", value_name="Value")
-    long_df["Value"] = pd.to_numeric(long_df["Value"], errors="coerce").fillna(0.0)
-
-    # --- 6) Aggregate and compute Sales Gas ---
-    grp_cols = ["TSE ID", "TSE Name", "Units", "Year", "BASE_ITEM"]
-    agg = long_df.groupby(grp_cols, as_index=False)["Value"].sum()
-
-    pivot = agg.pivot_table(
-        index=["TSE ID", "TSE Name", "Units", "Year"],
-        columns="BASE_ITEM",
-        values="Value",
-        aggfunc="sum",
-        fill_value=0.0,
-    )
+    df, restore_keys = categorize(df, ["TSE ID", "TSE Name", "Units", "BASE_ITEM"])
 
-    for c in ["Production Gas", "Fuel Gas", "Flare Gas", "Injection Gas", "Imported / Exported Gas"]:
-        if c not in pivot.columns:
-            pivot[c] = 0.0
-
-    pivot["Sales Gas"] = (
-        pivot["Production Gas"]
-        - pivot["Fuel Gas"]
-        - pivot["Flare Gas"]
-        - pivot["Injection Gas"]
-        - pivot["Imported / Exported Gas"]
-    )
+    # --- 5) Aggregate year blocks per TSE / Units / item (no reshape) ---
+    id_cols = ["TSE ID", "TSE Name", "Units"]
+    df[year_cols] = df[year_cols].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+    agg = df.groupby(id_cols + ["BASE_ITEM"], observed=True)[year_cols].sum()
 
-    # Back to long including Sales Gas
-    pivot = pivot.reset_index()
-    value_cols = [c for c in pivot.columns if c not in ["TSE ID", "TSE Name", "Units", "Year"]]
-    long_sales = pivot.melt(
-        id_vars=["TSE ID", "TSE Name", "Units", "Year"],
-        value_vars=value_cols,
-        var_name="BASE_ITEM",
-        value_name="Value",
+    # --- 6) One year block per item, aligned on TSE / Units; compute Sales Gas ---
+    wide = agg.unstack("BASE_ITEM", fill_value=0.0)
+    items = {
+        item: wide.xs(item, axis=1, level="BASE_ITEM")[year_cols]
+        for item in wide.columns.get_level_values("BASE_ITEM").unique()
+    }
+    zero = pd.DataFrame(0.0, index=wide.index, columns=year_cols)
+    for c in ["Production Gas", "Fuel Gas", "Flare Gas", "Injection Gas", "Imported / Exported Gas"]:
+        items.setdefault(c, zero)
+
+    items["Sales Gas"] = (
+        items["Production Gas"]
+        - items["Fuel Gas"]
+        - items["Flare Gas"]
+        - items["Injection Gas"]
+        - items["Imported / Exported Gas"]
     )
 
     # Keep items we publish
@@ -109,41 +111,26 @@ def load_bronze(file_path: str | Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
         "Imported / Exported Gas",
         "Sales Gas",
     ]
-    long_sales = long_sales[long_sales["BASE_ITEM"].isin(publish_items)].copy()
+    items = {k: v for k, v in items.items() if k in publish_items}
+
+    # Stack the item blocks: rows are (BASE_ITEM, TSE ID, TSE Name, Units)
+    stacked = pd.concat(items, names=["BASE_ITEM"]).reset_index()
+    stacked = restore_keys(stacked)
 
     # --- 7) Map PRODUCT / EQUITY_SHARE / PRODUCT_STREAM ---
-    meta = long_sales["BASE_ITEM"].map(ITEM_TO_META)
-    long_sales["PRODUCT"] = meta.apply(lambda x: x[0] if isinstance(x, tuple) else None)
-    long_sales["EQUITY_SHARE"] = meta.apply(lambda x: x[1] if isinstance(x, tuple) else None)
-    long_sales["PRODUCT_STREAM"] = meta.apply(lambda x: x[2] if isinstance(x, tuple) else None)
+    for col, mapping in META_MAPS.items():
+        stacked[col] = stacked["BASE_ITEM"].map(mapping)
 
     # --- 8) Drop rows where PRODUCT_STREAM is INJ or IMP ---
-    long_sales = long_sales[~long_sales["PRODUCT_STREAM"].isin(["INJ", "IMP"])].copy()
+    stacked = stacked[~stacked["PRODUCT_STREAM"].isin(["INJ", "IMP"])]
 
     # --- 9) Add UNCERTAINTY and VALUATION based on file name ---
     uncertainty, valuation = _file_tags_to_flags(file_path)
-    long_sales["UNCERTAINTY"] = uncertainty
-    long_sales["VALUATION"] = valuation
+    stacked["UNCERTAINTY"] = uncertainty
+    stacked["VALUATION"] = valuation
 
     # --- 10) Produce bronze WIDE (years as columns) ---
-    bronze_wide = long_sales.pivot_table(
-        index=[
-            "TSE ID",
-            "TSE Name",
-            "Units",
-            "BASE_ITEM",
-            "PRODUCT",
-            "EQUITY_SHARE",
-            "PRODUCT_STREAM",
-            "UNCERTAINTY",
-            "VALUATION",
-        ],
-        columns="Year",
-        values="Value",
-        aggfunc="sum",
-        fill_value=0.0,
-    ).reset_index()
-
+    bronze_wide = stacked.sort_values(["TSE ID", "TSE Name", "Units", "BASE_ITEM"]).reset_index(drop=True)
     bronze_wide = bronze_wide[
         [
             "TSE ID",
@@ -156,10 +143,28 @@ def load_bronze(file_path: str | Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
             "UNCERTAINTY",
             "VALUATION",
         ] + year_cols
+    ].rename_axis(columns="Year")
+
+    # --- 11) Bronze LONG (optional): the single melt, item-major like the wide stack ---
+    long_id_cols = [
+        "TSE ID",
+        "TSE Name",
+        "Units",
+        "PRODUCT",
+        "EQUITY_SHARE",
+        "PRODUCT_STREAM",
+        "BASE_ITEM",
+        "UNCERTAINTY",
+        "VALUATION",
     ]
-
-    # --- 11) Bronze LONG (optional) ---
-    bronze_long = long_sales[
+    bronze_long = (
+        stacked.set_index(long_id_cols)[year_cols]
+        .rename_axis(columns="Year")
+        .stack()
+        .rename("Value")
+        .reset_index()
+    )
+    bronze_long = bronze_long[
         [
             "TSE ID",
             "TSE Name",
@@ -173,7 +178,7 @@ def load_bronze(file_path: str | Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
             "UNCERTAINTY",
             "VALUATION",
         ]
-    ].copy()
+    ]
 
     return bronze_wide, bronze_long
 
@@ -15,31 +15,47 @@ Hierarchy comparison between P1 and R1 focused on AE/TE by **names** (not IDs).
 
 from __future__ import annotations
 from typing import Tuple, Optional
+import numpy as np
 import pandas as pd
 
+from src.core.utils import per_unique, strip_float_suffix, to_arrow_strings
+
 
 # ------------------------ normalization helpers ------------------------ #
 def _norm_id(s: pd.Series) -> pd.Series:
     """Normalize IDs to robust mergeable strings (strip, remove .0, upper, NA)."""
-    return (
-        s.astype(str)
-         .str.strip()
-         .str.replace(r"\.0$", "", regex=True)
-         .str.upper()
-         .replace({"NAN": pd.NA})
-    )
+    def norm(u: pd.Series) -> pd.Series:
+        return (
+            strip_float_suffix(u.astype(str).str.strip())
+             .str.upper()
+             .replace({"NAN": pd.NA})
+        )
+    return per_unique(s, norm)
+
+# df.attrs flag: TECHNICAL_SUB_ENTITY_ID already went through _norm_id (attrs follow copies/renames)
+_ID_NORMALIZED = "tse_id_normalized"
+
+def _norm_id_col(df: pd.DataFrame) -> pd.DataFrame:
+    """_norm_id on TECHNICAL_SUB_ENTITY_ID in place, once per frame lineage."""
+    if not df.attrs.get(_ID_NORMALIZED):
+        df["TECHNICAL_SUB_ENTITY_ID"] = _norm_id(df["TECHNICAL_SUB_ENTITY_ID"])
+        df.attrs[_ID_NORMALIZED] = True
+    return df
 
 def _norm_name(s: pd.Series) -> pd.Series:
     """Normalize names for comparison (trim, lower, treat ''/nan as NA)."""
-    return (
-        s.astype(str)
-         .str.strip()
-         .replace({"nan": pd.NA, "": pd.NA})
-         .str.lower()
-    )
-
-def _ensure_cols(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
-    out = df.copy()
+    def norm(u: pd.Series) -> pd.Series:
+        return (
+            u.astype(str)
+             .str.strip()
+             .replace({"nan": pd.NA, "": pd.NA})
+             .str.lower()
+        )
+    return per_unique(s, norm)
+
+def _ensure_cols(df: pd.DataFrame, cols: list[str], inplace: bool = False) -> pd.DataFrame:
+    """Add missing `cols` as NA. inplace=True for frames the caller already owns (a prepare-step copy)."""
+    out = df if inplace else df.copy(deep=False)  # only adds columns
     for c in cols:
         if c not in out.columns:
             out[c] = pd.NA
@@ -106,7 +122,7 @@ def _derive_r1_hierarchy_from_df(df: pd.DataFrame) -> pd.DataFrame:
         raise KeyError("R1 data lacks a 'TECHNICAL_SUB_ENTITY_ID' compatible column.")
 
     out = df.loc[:, existing].copy()
-    out["TECHNICAL_SUB_ENTITY_ID"] = _norm_id(out["TECHNICAL_SUB_ENTITY_ID"])
+    _norm_id_col(out)
     out = out.drop_duplicates(subset=["TECHNICAL_SUB_ENTITY_ID"]).reset_index(drop=True)
     return out
 
@@ -154,7 +170,7 @@ def load_r1_hierarchy_from_file(path: str) -> Tuple[pd.DataFrame, str]:
             if alt in df.columns:
                 df = df.rename(columns={alt: "TECHNICAL_SUB_ENTITY_ID"})
                 break
-    df["TECHNICAL_SUB_ENTITY_ID"] = _norm_id(df["TECHNICAL_SUB_ENTITY_ID"])
+    _norm_id_col(df)
     df = df.drop_duplicates(subset=["TECHNICAL_SUB_ENTITY_ID"]).reset_index(drop=True)
     return df, method
 
@@ -191,26 +207,28 @@ class HierarchyComparison:
         self.df_r1 = df_r1
         return self
 
+    # Setters keep shallow copies: nothing below writes into the stored frames' arrays,
+    # it only adds or replaces whole columns on its own copies
     def set_p1(self, df_p1: pd.DataFrame) -> "HierarchyComparison":
-        self.df_p1 = df_p1.copy()
+        self.df_p1 = df_p1.copy(deep=False)
         return self
 
     def set_r1(self, df_r1: pd.DataFrame) -> "HierarchyComparison":
-        self.df_r1 = df_r1.copy()
+        self.df_r1 = df_r1.copy(deep=False)
         return self
 
     # ---- preparation ---- #
     @staticmethod
     def _prepare_p1(df: pd.DataFrame) -> pd.DataFrame:
-        out = df.copy()
+        out = to_arrow_strings(df.copy(deep=False))  # opt-in, settings.USE_ARROW_STRINGS
         need = [
             "TECHNICAL_SUB_ENTITY_ID",
             "TECHNICAL_SUB_ENTITY_NAME",
             "ACTIVITY_ENTITY_NAME",
             "TECHNICAL_ENTITY_NAME",
         ]
-        out = _ensure_cols(out, need)
-        out["TECHNICAL_SUB_ENTITY_ID"] = _norm_id(out["TECHNICAL_SUB_ENTITY_ID"])
+        out = _ensure_cols(out, need, inplace=True)
+        _norm_id_col(out)
 
         # normalized name shadows for comparison
         out["_AE_NAME_norm"] = _norm_name(out["ACTIVITY_ENTITY_NAME"])
@@ -221,7 +239,7 @@ class HierarchyComparison:
 
     @staticmethod
     def _prepare_r1(df: pd.DataFrame) -> pd.DataFrame:
-        out = df.copy()
+        out = to_arrow_strings(df.copy(deep=False))  # opt-in, settings.USE_ARROW_STRINGS
 
         # Map PMASTER/PROJECT → canonical AE/TE names if needed
         if "ACTIVITY_ENTITY_NAME" not in out.columns and "PMASTER_NAME" in out.columns:
@@ -247,8 +265,9 @@ class HierarchyComparison:
                 "PMASTER_NAME",
                 "PROJECT_NAME",
             ],
+            inplace=True,
         )
-        out["TECHNICAL_SUB_ENTITY_ID"] = _norm_id(out["TECHNICAL_SUB_ENTITY_ID"])
+        _norm_id_col(out)
         out["_AE_NAME_norm"] = _norm_name(out["ACTIVITY_ENTITY_NAME"])
         out["_TE_NAME_norm"] = _norm_name(out["TECHNICAL_ENTITY_NAME"])
 
@@ -265,6 +284,14 @@ class HierarchyComparison:
         existing = [c for c in keep if c in out.columns]
         return out.loc[:, existing].drop_duplicates().reset_index(drop=True)
 
+    @staticmethod
+    def _name_match(p1: pd.Series, r1: pd.Series) -> np.ndarray:
+        """'✅' where both names are present and equal, else '❌' (compared as shared category codes)."""
+        a = p1.astype("category")
+        a_codes = a.cat.codes.to_numpy()
+        b_codes = r1.astype(a.dtype).cat.codes.to_numpy()  # names unseen in P1 -> -1
+        return np.where((a_codes >= 0) & (a_codes == b_codes), "✅", "❌")
+
     # ---- build ---- #
     def build(self) -> pd.DataFrame:
         if self.df_p1 is None or self.df_r1 is None:
@@ -278,22 +305,13 @@ class HierarchyComparison:
             p1, r1, on=key, how="outer", suffixes=("_P1", "_R1"), indicator=True
         )
 
-        # Presence flags
-        merged["P1_Present"] = merged["_merge"].map(lambda m: "✅" if m in ("both", "left_only") else "❌")
-        merged["R1_Present"] = merged["_merge"].map(lambda m: "✅" if m in ("both", "right_only") else "❌")
+        # Presence flags (isin on the categorical _merge checks its 3 categories, not every row)
+        merged["P1_Present"] = np.where(merged["_merge"].isin(("both", "left_only")), "✅", "❌")
+        merged["R1_Present"] = np.where(merged["_merge"].isin(("both", "right_only")), "✅", "❌")
 
         # Name match flags (only meaningful if both present)
-        merged["AE_Name_Match"] = (
-            merged["_AE_NAME_norm_P1"].notna()
-            & merged["_AE_NAME_norm_R1"].notna()
-            & (merged["_AE_NAME_norm_P1"] == merged["_AE_NAME_norm_R1"])
-        ).map({True: "✅", False: "❌"})
-
-        merged["TE_Name_Match"] = (
-            merged["_TE_NAME_norm_P1"].notna()
-            & merged["_TE_NAME_norm_R1"].notna()
-            & (merged["_TE_NAME_norm_P1"] == merged["_TE_NAME_norm_R1"])
-        ).map({True: "✅", False: "❌"})
+        merged["AE_Name_Match"] = self._name_match(merged["_AE_NAME_norm_P1"], merged["_AE_NAME_norm_R1"])
+        merged["TE_Name_Match"] = self._name_match(merged["_TE_NAME_norm_P1"], merged["_TE_NAME_norm_R1"])
 
         first_cols = [
             key,
@@ -305,7 +323,8 @@ class HierarchyComparison:
             "P1_Present", "R1_Present",
         ]
         first_cols = [c for c in first_cols if c in merged.columns]
-        other_cols = [c for c in merged.columns if c not in first_cols and c != "_merge"]
+        skip = set(first_cols) | {"_merge"}
+        other_cols = [c for c in merged.columns if c not in skip]
 
         out = merged.loc[:, first_cols + other_cols]
         self.df_out = out
@@ -382,18 +401,13 @@ if __name__ == "__main__":
             out_dir = Path("debug_outputs")
             out_dir.mkdir(parents=True, exist_ok=True)
             ts = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-            (out_dir / f"hierarchy_compare_{ts}.csv").write_text(
-                df.to_csv(index=False, encoding="utf-8-sig"), encoding="utf-8-sig"
-            )
+            # Stream straight to the file (no whole-CSV string in memory)
+            df.to_csv(out_dir / f"hierarchy_compare_{ts}.csv", index=False, encoding="utf-8-sig")
             # Also save the normalized sources that hc holds
             if isinstance(hc.df_p1, pd.DataFrame):
-                (out_dir / f"p1_hierarchy_loaded_{ts}.csv").write_text(
-                    hc.df_p1.to_csv(index=False, encoding="utf-8-sig"), encoding="utf-8-sig"
-                )
+                hc.df_p1.to_csv(out_dir / f"p1_hierarchy_loaded_{ts}.csv", index=False, encoding="utf-8-sig")
             if isinstance(hc.df_r1, pd.DataFrame):
-                (out_dir / f"r1_hierarchy_loaded_{ts}.csv").write_text(
-                    hc.df_r1.to_csv(index=False, encoding="utf-8-sig"), encoding="utf-8-sig"
-                )
+                hc.df_r1.to_csv(out_dir / f"r1_hierarchy_loaded_{ts}.csv", index=False, encoding="utf-8-sig")
             print(f"📝 Saved CSV snapshots in {out_dir.resolve()}")
 
     except Exception as e:
@@ -1,8 +1,13 @@
 # src/data/models/tse_compare.py
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from typing import Optional, Iterable
 
+from config.settings import COMPARE_YEAR_DTYPE
+from src.core.utils import group_sum, per_unique, strip_float_suffix, to_arrow_strings
+
 # Loaders (paths-based convenience)
 from src.data.bronze.bronze_p1_tse import LoaderP1TSE
 from src.data.bronze.bronze_r1 import R1Loader
@@ -27,70 +32,98 @@ class TSEComparator:
     def __init__(self):
         self.df_p1: Optional[pd.DataFrame] = None
         self.df_r1: Optional[pd.DataFrame] = None
+        # Year columns (numbers as strings), found once per set_*_df
+        self._p1_years: list[str] = []
+        self._r1_years: list[str] = []
+
+    # ---------- Normalization helpers ----------
+    @staticmethod
+    def _norm_id(s: pd.Series) -> pd.Series:
+        return strip_float_suffix(s.astype(str).str.strip().str.upper())
+
+    @staticmethod
+    def _norm_enum(col: pd.Series) -> pd.Series:
+        # For enumerations (e.g., EQUITY_SHARE, PRODUCT_STREAM, PRODUCT, etc.)
+        return col.astype(str).str.strip().str.upper()
+
+    def _normalize_keys(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Normalize ID + enum-like merge keys (EXCLUDING name) in place; done once per set_*_df."""
+        if "TECHNICAL_SUB_ENTITY_ID" in df.columns:
+            df["TECHNICAL_SUB_ENTITY_ID"] = per_unique(df["TECHNICAL_SUB_ENTITY_ID"], self._norm_id)
+        for k in self.MERGE_KEYS:
+            if k not in ("TECHNICAL_SUB_ENTITY_ID", "TECHNICAL_SUB_ENTITY_NAME") and k in df.columns:
+                df[k] = per_unique(df[k], self._norm_enum)
+        return df
 
     # ---------- API: dataframes ----------
+    # Setters take shallow copies: _normalize_keys only replaces whole columns
     def set_p1_df(self, df: pd.DataFrame) -> "TSEComparator":
-        self.df_p1 = df.copy()
+        self.df_p1 = df.copy(deep=False)
         # Ensure rename 'TSE ID' -> 'TECHNICAL_SUB_ENTITY_ID'
         if "TECHNICAL_SUB_ENTITY_ID" not in self.df_p1.columns and "TSE ID" in self.df_p1.columns:
             self.df_p1 = self.df_p1.rename(columns={"TSE ID": "TECHNICAL_SUB_ENTITY_ID"})
+        self._normalize_keys(to_arrow_strings(self.df_p1))
+        self._p1_years = [c for c in self.df_p1.columns if str(c).isdigit()]
         return self
 
     def set_r1_df(self, df: pd.DataFrame) -> "TSEComparator":
-        self.df_r1 = df.copy()
+        self.df_r1 = self._normalize_keys(to_arrow_strings(df.copy(deep=False)))
+        self._r1_years = [c for c in self.df_r1.columns if str(c).isdigit()]
         return self
 
     # ---------- API: paths convenience ----------
     @classmethod
-    def from_paths(cls, p1_path: str, r1_path: str) -> "TSEComparator":
+    def from_paths(
+        cls,
+        p1_path: str,
+        r1_path: str,
+        *,
+        p1_loader_cls: type = LoaderP1TSE,
+        r1_loader_cls: type = R1Loader,
+    ) -> "TSEComparator":
         inst = cls()
-        # P1 TSE
-        p1_loader = LoaderP1TSE(p1_path)
-        df_p1 = p1_loader.extract_production_data()
-        # R1
-        r1_loader = R1Loader(r1_path)
-        r1_loader.load_data()
-        df_r1 = r1_loader.create_production_dataframe()
-        return inst.set_p1_df(df_p1).set_r1_df(df_r1)
+
+        def _load_p1() -> pd.DataFrame:
+            return p1_loader_cls(p1_path).extract_production_data()
+
+        def _load_r1() -> pd.DataFrame:
+            r1_loader = r1_loader_cls(r1_path)
+            r1_loader.load_data()
+            return r1_loader.create_production_dataframe()
+
+        # Independent files: parse P1 TSE and R1 concurrently (wall time ~ the slower one)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            fut_p1, fut_r1 = pool.submit(_load_p1), pool.submit(_load_r1)
+        return inst.set_p1_df(fut_p1.result()).set_r1_df(fut_r1.result())
+
+    @staticmethod
+    def _sum_years(df: pd.DataFrame, keys: list[str], years: list[str]) -> pd.DataFrame:
+        """
+        groupby(keys)[years].sum().reset_index(), with all year columns summed in one
+        np.add.reduceat over the group-sorted 2-D block instead of per column.
+        """
+        grouped = df.groupby(keys, observed=True)
+        codes = grouped.ngroup()
+        keep = codes.notna().to_numpy()  # rows with a missing key are dropped, as groupby does
+        values = np.nan_to_num(df[years].to_numpy(dtype=COMPARE_YEAR_DTYPE)[keep], copy=False)  # boolean take is already a copy
+        sums = group_sum(codes.to_numpy()[keep].astype(np.int64), values)
+        return pd.DataFrame(sums, columns=years, index=grouped.size().index).reset_index()
 
     # ---------- core compare ----------
     def compare(self) -> pd.DataFrame:
         if self.df_p1 is None or self.df_r1 is None:
             raise RuntimeError("Set P1 and R1 dataframes first or use from_paths().")
 
-        p1 = self.df_p1.copy()
-        r1 = self.df_r1.copy()
-
-        # --- Normalization helpers ---
-        def norm_id(s: pd.Series) -> pd.Series:
-            return (
-                s.astype(str)
-                .str.strip()
-                .str.upper()
-                .str.replace(r"\.0$", "", regex=True)
-            )
-
-        def norm_enum(col: pd.Series) -> pd.Series:
-            # For enumerations (e.g., EQUITY_SHARE, PRODUCT_STREAM, PRODUCT, etc.)
-            return col.astype(str).str.strip().str.upper()
+        # Shallow copies: compare() only replaces whole key columns (never writes into them),
+        # so the stored frames stay untouched without duplicating the year blocks
+        p1 = self.df_p1.copy(deep=False)
+        r1 = self.df_r1.copy(deep=False)
 
-        # --- Normalize IDs ---
-        if "TECHNICAL_SUB_ENTITY_ID" in p1.columns:
-            p1["TECHNICAL_SUB_ENTITY_ID"] = norm_id(p1["TECHNICAL_SUB_ENTITY_ID"])
-        if "TECHNICAL_SUB_ENTITY_ID" in r1.columns:
-            r1["TECHNICAL_SUB_ENTITY_ID"] = norm_id(r1["TECHNICAL_SUB_ENTITY_ID"])
-
-        # --- Normalize enum-like keys (EXCLUDING name) ---
-        enum_keys = [k for k in self.MERGE_KEYS if k not in ("TECHNICAL_SUB_ENTITY_ID", "TECHNICAL_SUB_ENTITY_NAME")]
-        for k in enum_keys:
-            if k in p1.columns:
-                p1[k] = norm_enum(p1[k])
-            if k in r1.columns:
-                r1[k] = norm_enum(r1[k])
+        # Merge keys were normalized once in set_p1_df / set_r1_df
 
         # --- Year columns (numbers as strings) ---
-        p1_years = [c for c in p1.columns if str(c).isdigit()]
-        r1_years = [c for c in r1.columns if str(c).isdigit()]
+        p1_years = self._p1_years
+        r1_years = self._r1_years
         common_years = sorted(set(p1_years).intersection(r1_years))
 
         # --- Keys for grouping / merging (NO name here) ---
@@ -98,13 +131,27 @@ class TSEComparator:
         p1_keys = [k for k in base_keys if k in p1.columns]
         r1_keys = [k for k in base_keys if k in r1.columns]
 
+        # --- Shared keys as categoricals with one (sorted) category set on both sides ---
+        # groupby and merge then hash int codes; sorted categories keep the string sort order
+        key_dtypes = {k: p1[k].dtype for k in p1_keys if k in r1_keys}
+        for k in key_dtypes:
+            cat = pd.CategoricalDtype(sorted(set(p1[k].dropna().unique()).union(r1[k].dropna().unique())))
+            p1[k] = p1[k].astype(cat)
+            r1[k] = r1[k].astype(cat)
+
         # --- Aggregate (sum) by keys ---
-        p1_agg = p1.groupby(p1_keys)[p1_years].sum().reset_index() if p1_years else p1[p1_keys].drop_duplicates()
-        r1_agg = r1.groupby(r1_keys)[r1_years].sum().reset_index() if r1_years else r1[r1_keys].drop_duplicates()
+        def _aggregate(df: pd.DataFrame, keys: list[str], years: list[str]) -> pd.DataFrame:
+            return self._sum_years(df, keys, years) if years else df[keys].drop_duplicates()
+
+        # Independent sides: the sort/reduceat inside run without the GIL, so P1 and R1 overlap
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            fut_p1 = pool.submit(_aggregate, p1, p1_keys, p1_years)
+            fut_r1 = pool.submit(_aggregate, r1, r1_keys, r1_years)
+        p1_agg, r1_agg = fut_p1.result(), fut_r1.result()
 
         # --- Carry UNITS from R1 (first per group) ---
         if "UNITS" in r1.columns:
-            r1_units = r1.groupby(r1_keys)["UNITS"].first().reset_index()
+            r1_units = r1.groupby(r1_keys, observed=True)["UNITS"].first().reset_index()
             r1_agg = pd.merge(r1_agg, r1_units, on=r1_keys, how="left")
 
         # --- Ensure merge columns exist on both sides ---
@@ -122,13 +169,15 @@ class TSEComparator:
             suffixes=("_P1", "_R1"),
             indicator=True
         )
+        for k, dt in key_dtypes.items():
+            merged[k] = merged[k].astype(dt)
 
-        # --- Add per-year diffs ---
-        for y in common_years:
-            p1_col = f"{y}_P1"
-            r1_col = f"{y}_R1"
-            if p1_col in merged.columns and r1_col in merged.columns:
-                merged[f"{y}_Diff"] = merged[p1_col].fillna(0) - merged[r1_col].fillna(0)
+        # --- Add per-year diffs (one block subtract over all common years) ---
+        diff_years = [y for y in common_years if f"{y}_P1" in merged.columns and f"{y}_R1" in merged.columns]
+        if diff_years:
+            p1_block = merged[[f"{y}_P1" for y in diff_years]].fillna(0).to_numpy()
+            r1_block = merged[[f"{y}_R1" for y in diff_years]].fillna(0).to_numpy()
+            merged[[f"{y}_Diff" for y in diff_years]] = p1_block - r1_block
 
         # --- Re-attach TECHNICAL_SUB_ENTITY_NAME by ID (prefer P1, then R1) ---
         name_cols = ["TECHNICAL_SUB_ENTITY_ID", "TECHNICAL_SUB_ENTITY_NAME"]
@@ -137,32 +186,43 @@ class TSEComparator:
         if "TECHNICAL_SUB_ENTITY_NAME" in p1.columns:
             # Use original case for names; only normalize ID
             nm = p1[name_cols].dropna(subset=["TECHNICAL_SUB_ENTITY_ID"]).copy()
-            nm["TECHNICAL_SUB_ENTITY_ID"] = norm_id(nm["TECHNICAL_SUB_ENTITY_ID"])
+            nm["TECHNICAL_SUB_ENTITY_ID"] = per_unique(nm["TECHNICAL_SUB_ENTITY_ID"], self._norm_id)
             candidates.append(nm.drop_duplicates())
 
         if "TECHNICAL_SUB_ENTITY_NAME" in r1.columns:
             nm = r1[name_cols].dropna(subset=["TECHNICAL_SUB_ENTITY_ID"]).copy()
-            nm["TECHNICAL_SUB_ENTITY_ID"] = norm_id(nm["TECHNICAL_SUB_ENTITY_ID"])
+            nm["TECHNICAL_SUB_ENTITY_ID"] = per_unique(nm["TECHNICAL_SUB_ENTITY_ID"], self._norm_id)
             candidates.append(nm.drop_duplicates())
 
         if candidates:
             name_map = pd.concat(candidates, ignore_index=True)
             # prefer first occurrence (P1 first because we appended it first)
-            name_map = name_map.drop_duplicates(subset=["TECHNICAL_SUB_ENTITY_ID"], keep="first")
-            merged = merged.merge(name_map, on="TECHNICAL_SUB_ENTITY_ID", how="left")
+            name_map = (
+                name_map.drop_duplicates(subset=["TECHNICAL_SUB_ENTITY_ID"], keep="first")
+                .set_index("TECHNICAL_SUB_ENTITY_ID")["TECHNICAL_SUB_ENTITY_NAME"]
+            )
+            # Unique ID index: a lookup, not a second hash join over the merged frame
+            merged["TECHNICAL_SUB_ENTITY_NAME"] = merged["TECHNICAL_SUB_ENTITY_ID"].map(name_map)
 
         # --- Presence flags ---
-        merged["Present_P1"] = merged["_merge"].apply(lambda m: "✅" if m in ("both", "left_only") else "❌")
-        merged["Present_R1"] = merged["_merge"].apply(lambda m: "✅" if m in ("both", "right_only") else "❌")
+        merged["Present_P1"] = np.where(merged["_merge"].isin(("both", "left_only")), "✅", "❌")
+        merged["Present_R1"] = np.where(merged["_merge"].isin(("both", "right_only")), "✅", "❌")
 
         # --- Reorder: base keys + NAME, then years/diffs, then others, then flags ---
         first = base_keys.copy()
         if "TECHNICAL_SUB_ENTITY_NAME" in merged.columns:
             first.insert(1, "TECHNICAL_SUB_ENTITY_NAME")  # right after ID
 
-        year_and_diffs = [c for c in merged.columns if any(str(y) == c or c.startswith(f"{y}_") for y in common_years)]
         flags = ["Present_P1", "Present_R1", "_merge"]
-        others = [c for c in merged.columns if c not in set(first + year_and_diffs + flags)]
+        # One pass over the columns: '<year>' / '<year>_*' for common years, else 'others'
+        year_tags = {str(y) for y in common_years}
+        skip = set(first) | set(flags)
+        year_and_diffs, others = [], []
+        for c in merged.columns:
+            if str(c).split("_", 1)[0] in year_tags:
+                year_and_diffs.append(c)
+            elif c not in skip:
+                others.append(c)
 
         out = merged.loc[:, first + year_and_diffs + others + flags]
         return out
\ No newline at end of file
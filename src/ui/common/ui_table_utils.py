@@ -1,6 +1,7 @@
 # src/ui/common/ui_table_utils.py
 from __future__ import annotations
 from typing import Optional, Set, Callable
+import numpy as np
 import pandas as pd
 from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, QTimer, QObject
 from PySide6.QtGui import QColor
@@ -18,7 +19,19 @@ def norm_series_upper(s: pd.Series) -> pd.Series:
     return s.dropna().astype(str).str.strip().str.upper()
 
 
+def is_year_value_col(col) -> bool:
+    """True for 'YYYY_P1' / 'YYYY_R1' columns."""
+    c = str(col)
+    return c.endswith(("_P1", "_R1")) and c[:-3].isdigit()
+
+
 # ---------- Models ----------
+# Red for mismatch (❌), green for aligned (✅); built once, not per paint
+_RED = QColor(255, 150, 150)
+_GREEN = QColor(204, 255, 229)
+_MARKS = {"❌": _RED, "✅": _GREEN}
+
+
 class ColorPandasModel(QAbstractTableModel):
     """
     Simple model over a pandas DataFrame that centers text and colors ✅/❌ cells.
@@ -26,30 +39,32 @@ class ColorPandasModel(QAbstractTableModel):
     def __init__(self, df: pd.DataFrame):
         super().__init__()
         self._df = df if isinstance(df, pd.DataFrame) else pd.DataFrame()
+        # Plain ndarray snapshots: data()/headerData() skip pandas indexing per cell
+        self._values = self._df.to_numpy(copy=False)
+        self._columns = self._df.columns.to_numpy()
 
     def rowCount(self, parent=QModelIndex()):
         return len(self._df)
 
     def columnCount(self, parent=QModelIndex()):
-        return len(self._df.columns)
+        return len(self._columns)
 
     def data(self, index, role=Qt.DisplayRole):
         if not index.isValid():
             return None
-        value = "" if index.row() >= len(self._df) else str(self._df.iat[index.row(), index.column()])
+        value = "" if index.row() >= len(self._values) else str(self._values[index.row(), index.column()])
         if role == Qt.DisplayRole:
             return value
         if role == Qt.TextAlignmentRole:
             return Qt.AlignCenter
-        if role == Qt.BackgroundRole and value in ["❌", "✅"]:
-            # Red for mismatch (❌), green for aligned (✅)
-            return QColor(255, 150, 150) if value == "❌" else QColor(204, 255, 229)
+        if role == Qt.BackgroundRole:
+            return _MARKS.get(value)
         return None
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if role == Qt.DisplayRole:
             if orientation == Qt.Horizontal:
-                return str(self._df.columns[section]) if section < len(self._df.columns) else ""
+                return str(self._columns[section]) if section < len(self._columns) else ""
             return str(section + 1)
         return None
 
@@ -60,6 +75,8 @@ class DynamicNumericModel(QAbstractTableModel):
       - formats numeric columns for DisplayRole
       - exposes raw float in UserRole for correct sorting
       - optional background coloring via a predicate(col_name, value) -> QColor|None
+    Display strings and floats are built once per frame (__init__ / set_df),
+    so data() is a plain array lookup on every repaint.
     """
     def __init__(
         self,
@@ -69,53 +86,74 @@ class DynamicNumericModel(QAbstractTableModel):
         fmt: str = "{:,.2f}",
     ):
         super().__init__()
-        self._df = df if isinstance(df, pd.DataFrame) else pd.DataFrame()
-        self._nums = set(numeric_cols) if numeric_cols else {
-            c for c in self._df.columns if pd.api.types.is_numeric_dtype(self._df[c])
-        }
+        self._numeric_cols = set(numeric_cols) if numeric_cols else None
         self._fmt = fmt
         self._bgp = bg_predicate
+        self._build(df)
+
+    def set_df(self, df: pd.DataFrame):
+        self.beginResetModel()
+        self._build(df)
+        self.endResetModel()
+
+    def _build(self, df: pd.DataFrame):
+        self._df = df if isinstance(df, pd.DataFrame) else pd.DataFrame()
+        self._values = self._df.to_numpy(copy=False)
+        self._columns = self._df.columns.to_numpy()
+        # dtype.kind covers numpy and nullable (Int64/Float64/boolean) dtypes alike
+        self._nums = self._numeric_cols if self._numeric_cols is not None else {
+            c for c, dt in zip(self._df.columns, self._df.dtypes) if dt.kind in "iufcb"
+        }
+        n_rows, n_cols = self._df.shape
+        self._is_num = np.array([c in self._nums for c in self._df.columns], dtype=bool)
+        self._disp = np.full((n_rows, n_cols), "", dtype=object)
+        self._raw_float = np.zeros((n_rows, n_cols), dtype="float64")
+        self._has_val = np.zeros((n_rows, n_cols), dtype=bool)
+
+        for j in range(n_cols):
+            s = self._df.iloc[:, j]
+            if self._is_num[j]:
+                # values float() could not read show as blank, like missing ones
+                vals = pd.to_numeric(s, errors="coerce").astype("float64")
+                ok = vals.notna().to_numpy()
+                self._disp[ok, j] = vals[ok].map(self._fmt.format).to_numpy()
+                self._raw_float[ok, j] = vals.to_numpy()[ok]
+                self._has_val[:, j] = ok
+            else:
+                ok = s.notna().to_numpy()
+                self._disp[ok, j] = s[ok].map(str).to_numpy()
 
     def rowCount(self, parent=QModelIndex()):
         return len(self._df)
 
     def columnCount(self, parent=QModelIndex()):
-        return len(self._df.columns)
+        return len(self._columns)
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if role == Qt.DisplayRole:
             if orientation == Qt.Horizontal:
-                return str(self._df.columns[section]) if section < len(self._df.columns) else ""
+                return str(self._columns[section]) if section < len(self._columns) else ""
             return str(section + 1)
         return None
 
     def data(self, index, role=Qt.DisplayRole):
         if not index.isValid():
             return None
-        col = self._df.columns[index.column()]
-        val = self._df.iat[index.row(), index.column()]
-        is_num = col in self._nums
+        r, c = index.row(), index.column()
 
         if role == Qt.DisplayRole:
-            if is_num:
-                try:
-                    return self._fmt.format(float(val))
-                except Exception:
-                    return ""
-            return "" if pd.isna(val) else str(val)
+            return self._disp[r, c]
 
+        is_num = self._is_num[c]
         if role == Qt.UserRole and is_num:
-            try:
-                return float(val)
-            except Exception:
-                return 0.0
+            return float(self._raw_float[r, c])
 
         if role == Qt.TextAlignmentRole:
             return Qt.AlignRight if is_num else Qt.AlignLeft
 
-        if role == Qt.BackgroundRole and self._bgp and is_num and pd.notna(val):
+        if role == Qt.BackgroundRole and self._bgp and is_num and self._has_val[r, c]:
             try:
-                return self._bgp(col, float(val))
+                return self._bgp(self._columns[c], float(self._raw_float[r, c]))
             except Exception:
                 return None
 
@@ -129,31 +167,44 @@ class EqualFillSizer(QObject):
     Installs on a QTableView to keep columns equal and filling the viewport
     on init and after resizes (without blocking user's manual column drags).
     """
+    RESIZE_DEBOUNCE_MS = 50
+
     def __init__(self, table: QTableView, min_col_width: int = 80, reapply_on_resize: bool = True):
         super().__init__(parent=table)  # parent to table so it is owned & cleaned up
         self.table = table
         self.min_col_width = int(min_col_width)
         self.reapply = bool(reapply_on_resize)
-        self._defer = False
+        # One restartable single-shot timer: a burst of resizes (window drag) collapses
+        # into a single equalize once events stop for RESIZE_DEBOUNCE_MS
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.RESIZE_DEBOUNCE_MS)
+        self._timer.timeout.connect(self.equalize_and_fill)
+        self._refresh_metrics()
 
         table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
         table.installEventFilter(self)  # now valid because we are a QObject
 
     # QObject event filter
     def eventFilter(self, obj: QObject, event: QEvent) -> bool:
-        if obj is self.table and self.reapply and event.type() == QEvent.Resize:
-            self.defer_equalize()
+        if obj is self.table:
+            etype = event.type()
+            if etype in (QEvent.StyleChange, QEvent.FontChange):
+                self._refresh_metrics()
+            if self.reapply and etype == QEvent.Resize:
+                self.defer_equalize()
         # return False to continue normal processing
         return False
 
+    def _refresh_metrics(self):
+        # Re-read only on style/font changes. Header and scrollbar widths stay live:
+        # the header grows with the row count, the scrollbar width comes from the QSS.
+        self._grid_gap = 1 if self.table.showGrid() else 0
+
     def defer_equalize(self):
-        if self._defer:
-            return
-        self._defer = True
-        QTimer.singleShot(0, self.equalize_and_fill)
+        self._timer.start()  # restarts if already pending
 
     def equalize_and_fill(self):
-        self._defer = False
         hdr = self.table.horizontalHeader()
         col_count = hdr.count()
         if col_count <= 0:
@@ -163,10 +214,6 @@ class EqualFillSizer(QObject):
         hdr.setStretchLastSection(False)
         hdr.setSectionResizeMode(QHeaderView.Fixed)
 
-        # Ensure geometry is up-to-date
-        self.table.doItemsLayout()
-        self.table.viewport().update()
-
         # Compute usable width
         viewport_w = self.table.viewport().width()
 
@@ -179,21 +226,23 @@ class EqualFillSizer(QObject):
             viewport_w -= vsb.width()
 
         # Deduct inter-column grid gaps
-        grid_gap = 1 if self.table.showGrid() else 0
-        usable = viewport_w - max(0, col_count - 1) * grid_gap
+        usable = viewport_w - max(0, col_count - 1) * self._grid_gap
         if usable <= 0:
             hdr.setSectionResizeMode(QHeaderView.Interactive)
             return
 
-        base = max(self.min_col_width, usable // col_count)
-        if base * col_count > usable:
-            base = max(self.min_col_width, usable // col_count)
-        total_base = base * col_count
-        remainder = max(0, usable - total_base)
-
-        for i in range(col_count):
-            w = base + (1 if i < remainder else 0)
-            hdr.resizeSection(i, w)
+        # Spread leftover pixels over the first columns; never go below min_col_width
+        base, remainder = divmod(max(self.min_col_width * col_count, usable), col_count)
+        widths = [base + 1] * remainder + [base] * (col_count - remainder)
+
+        # Hold repaints until every section has its width: one paint instead of one per
+        # column. Header signals stay live - the view moves its columns on sectionResized.
+        self.table.setUpdatesEnabled(False)
+        try:
+            for i, w in enumerate(widths):
+                hdr.resizeSection(i, w)
+        finally:
+            self.table.setUpdatesEnabled(True)
 
         # Return control to users
         hdr.setSectionResizeMode(QHeaderView.Interactive)
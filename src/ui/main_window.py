@@ -1,10 +1,11 @@
 # src/ui/main_window.py
 import os
 import sys
+from collections import OrderedDict
 import pandas as pd
 from typing import Optional
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QPixmap, QPalette, QBrush
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QTabWidget, QMessageBox
@@ -21,7 +22,7 @@ from src.ui.tab_ae_overview import AEOverviewTab
 from src.ui.tab_ae_annual import AEAnnualTab
 
 # New small, testable app-logic modules
-from src.core.orchestrator import DataOrchestrator
+from src.core.orchestrator import DataOrchestrator, clear_file_memo
 from src.core.tab_policy import InputsReady, tabs_to_enable
 from src.core.publish import publish_tse, publish_hierarchy
 
@@ -32,8 +33,22 @@ class MainWindow(QMainWindow):
       • Loads each file once (no reload loops).
       • Builds TSE compare only when P1 TSE + R1 exist.
       • Builds Hierarchy compare only when P1 Hierarchy + R1 exist.
+      • Creates each data tab the first time it gets enabled.
       • Ignores Anaplan for now.
     """
+    # Data tabs in display order: (policy key, attribute, label, class)
+    _TAB_SPECS = (
+        ("HIER_HEALTH",  "tab_hier_health",  "✅ Hierarchy Health",    HierarchyHealthTab),
+        ("HIER_COMPARE", "tab_hier_compare", "🧭 Hierarchy Comparison", HierarchyCompareTab),
+        ("AE_OVERVIEW",  "tab_ae_overview",  "📚 AE Overview",         AEOverviewTab),
+        ("AE_ANNUAL",    "tab_ae_annual",    "📉 AE Annual",           AEAnnualTab),
+        ("TSE_SUMMARY",  "tab_summary",      "📋 TSE Summary",         TSESummaryTab),
+        ("TSE_TOTALS",   "tab_totals",       "📈 TSE Totals",          TSETotalsTab),
+        ("TSE_ANNUAL",   "tab_forecast",     "📊 TSE Annual",          TSEForecastTab),
+    )
+    _BG_BUCKET = 40       # px: resize tolerance and pixmap cache granularity
+    _BG_CACHE_SIZE = 4
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("P1–R1 QC Tool")
@@ -44,6 +59,7 @@ class MainWindow(QMainWindow):
         self._qss_path = r"src\\ui\\resources\\styles.qss"
         self._bg_pixmap = QPixmap(self._bg_path)
         self._last_sz = None
+        self._scaled_cache: "OrderedDict[tuple[int, int], QPixmap]" = OrderedDict()
         self._load_stylesheet()
         self._apply_background(force=True)
 
@@ -69,36 +85,32 @@ class MainWindow(QMainWindow):
         self.tab_input.clear_requested.connect(self._on_clear_all)
         self.tabs.addTab(self.tab_input, "📥 Data Input")
 
-        # Hierarchy
-        self.tab_hier_health = HierarchyHealthTab()
-        self.tabs.addTab(self.tab_hier_health, "✅ Hierarchy Health")
-        self.tabs.setTabEnabled(self.tabs.indexOf(self.tab_hier_health), False)
-
-        self.tab_hier_compare = HierarchyCompareTab()
-        self.tabs.addTab(self.tab_hier_compare, "🧭 Hierarchy Comparison")
-        self.tabs.setTabEnabled(self.tabs.indexOf(self.tab_hier_compare), False)
-
-        # AE (optional)
-        self.tab_ae_overview = AEOverviewTab()
-        self.tabs.addTab(self.tab_ae_overview, "📚 AE Overview")
-        self.tabs.setTabEnabled(self.tabs.indexOf(self.tab_ae_overview), False)
-
-        self.tab_ae_annual = AEAnnualTab()
-        self.tabs.addTab(self.tab_ae_annual, "📉 AE Annual")
-        self.tabs.setTabEnabled(self.tabs.indexOf(self.tab_ae_annual), False)
-
-        # TSE
-        self.tab_summary = TSESummaryTab()
-        self.tabs.addTab(self.tab_summary, "📋 TSE Summary")
-        self.tabs.setTabEnabled(self.tabs.indexOf(self.tab_summary), False)
-
-        self.tab_totals = TSETotalsTab()
-        self.tabs.addTab(self.tab_totals, "📈 TSE Totals")
-        self.tabs.setTabEnabled(self.tabs.indexOf(self.tab_totals), False)
-
-        self.tab_forecast = TSEForecastTab()
-        self.tabs.addTab(self.tab_forecast, "📊 TSE Annual")
-        self.tabs.setTabEnabled(self.tabs.indexOf(self.tab_forecast), False)
+        # Data tabs: disabled placeholders until data enables them (see _ensure_tab)
+        self._tab_slots: dict[str, QWidget] = {}
+        for key, _attr, label, _cls in self._TAB_SPECS:
+            slot = QWidget()
+            self.tabs.addTab(slot, label)
+            self.tabs.setTabEnabled(self.tabs.indexOf(slot), False)
+            self._tab_slots[key] = slot
+
+    def _ensure_tab(self, key: str) -> QWidget:
+        """Return the tab for `key`, building it in place of its placeholder on first use."""
+        _, attr, label, cls = next(spec for spec in self._TAB_SPECS if spec[0] == key)
+        tab = getattr(self, attr, None)
+        if tab is not None:
+            return tab
+
+        slot = self._tab_slots[key]
+        tab = cls()
+        idx = self.tabs.indexOf(slot)
+        enabled = self.tabs.isTabEnabled(idx)
+        self.tabs.removeTab(idx)
+        self.tabs.insertTab(idx, tab, label)
+        self.tabs.setTabEnabled(idx, enabled)
+        slot.deleteLater()
+        self._tab_slots[key] = tab
+        setattr(self, attr, tab)
+        return tab
 
     # ---------- look & feel ----------
     def _load_stylesheet(self):
@@ -111,15 +123,30 @@ class MainWindow(QMainWindow):
         if self._bg_pixmap.isNull():
             return
         sz = self.size()
-        if not force and self._last_sz and abs(sz.width() - self._last_sz.width()) < 40:
+        if not force and self._last_sz and abs(sz.width() - self._last_sz.width()) < self._BG_BUCKET:
             return
         self._last_sz = sz
-        scaled = self._bg_pixmap.scaled(sz, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+        scaled = self._scaled_background(sz)
         pal = self.palette()
         pal.setBrush(QPalette.Window, QBrush(scaled))
         self.setPalette(pal)
         self.setAutoFillBackground(True)
 
+    def _scaled_background(self, sz):
+        # Smooth scaling is costly; keep a few recent sizes, bucketed (rounded up) to
+        # _BG_BUCKET so the cached pixmap still covers the window
+        key = (-(-sz.width() // self._BG_BUCKET), -(-sz.height() // self._BG_BUCKET))
+        scaled = self._scaled_cache.get(key)
+        if scaled is None:
+            target = QSize(key[0] * self._BG_BUCKET, key[1] * self._BG_BUCKET)
+            scaled = self._bg_pixmap.scaled(target, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+            self._scaled_cache[key] = scaled
+            if len(self._scaled_cache) > self._BG_CACHE_SIZE:
+                self._scaled_cache.popitem(last=False)
+        else:
+            self._scaled_cache.move_to_end(key)
+        return scaled
+
     def resizeEvent(self, e):
         super().resizeEvent(e)
         self._apply_background()
@@ -127,22 +154,24 @@ class MainWindow(QMainWindow):
     # ---------- clear ----------
     def _on_clear_all(self):
         self.orch = DataOrchestrator()  # reset logic/state
+        clear_file_memo()  # drop the parsed frames kept for path switches
 
         for i in range(self.tabs.count()):
             self.tabs.setTabEnabled(i, self.tabs.widget(i) is self.tab_input)
 
-        # Clear data in views
-        try:
-            empty = pd.DataFrame()
-            self.tab_summary.set_data(empty)
-            self.tab_totals.set_data(empty)
-            self.tab_forecast.set_data(empty)
-        except Exception:
-            pass
-        self.tab_hier_health.reset_view()
-        self.tab_hier_compare.reset_view()
-        self.tab_ae_overview.reset_view()
-        self.tab_ae_annual.reset_view()
+        # Clear data in views (tabs never built have nothing to clear)
+        empty = pd.DataFrame()
+        for _key, attr, _label, _cls in self._TAB_SPECS:
+            tab = getattr(self, attr, None)
+            if tab is None:
+                continue
+            if hasattr(tab, "reset_view"):
+                tab.reset_view()
+            else:
+                try:
+                    tab.set_data(empty)
+                except Exception:
+                    pass
 
         self.tabs.setCurrentWidget(self.tab_input)
 
@@ -157,12 +186,13 @@ class MainWindow(QMainWindow):
         if "r1_path" in data:               self.orch.set_r1(data["r1_path"])
         if "sdfp_path" in data:             pass  # not used now
 
-        # 2) Load changed sources (each loader has a no‑reload guard)
+        # 2) Load changed sources concurrently (each loader has a no‑reload guard)
         try:
-            if "p1_path" in data:               self.orch.load_p1_tse()
-            if ("p1_hierarchy_path" in data) or ("p1_hierarchy_sheet" in data and self.orch.p1_hier_path):
-                self.orch.load_p1_hierarchy()
-            if "r1_path" in data:               self.orch.load_r1()
+            self.orch.load_all(
+                p1_tse="p1_path" in data,
+                p1_hier=("p1_hierarchy_path" in data) or ("p1_hierarchy_sheet" in data and bool(self.orch.p1_hier_path)),
+                r1="r1_path" in data,
+            )
         except Exception as e:
             self._error("Load failed", e); return
 
@@ -170,6 +200,9 @@ class MainWindow(QMainWindow):
         try:
             tse_df = self.orch.build_tse_compare()
             if tse_df is not None:
+                # Publish even if the tabs stay disabled; build them first
+                for key in ("TSE_SUMMARY", "TSE_TOTALS", "TSE_ANNUAL"):
+                    self._ensure_tab(key)
                 publish_tse(self, tse_df)
         except Exception as e:
             self._error("TSE comparison failed", e)
@@ -183,6 +216,8 @@ class MainWindow(QMainWindow):
                 print("Hierarchy DF sample:\n", hc_df.head(3))
 
             if hc_model is not None and hc_df is not None:
+                for key in ("HIER_COMPARE", "HIER_HEALTH"):
+                    self._ensure_tab(key)
                 publish_hierarchy(self, hc_model, hc_df)
         except Exception as e:
             self._error("Hierarchy comparison failed", e)
@@ -198,18 +233,12 @@ class MainWindow(QMainWindow):
 
     # ---------- helpers ----------
     def _apply_tab_enable(self, m: dict[str, bool]):
-        def set_enabled(widget, key):
+        for key, _attr, _label, _cls in self._TAB_SPECS:
+            on = bool(m.get(key, False))
+            widget = self._ensure_tab(key) if on else self._tab_slots[key]
             idx = self.tabs.indexOf(widget)
             if idx >= 0:
-                self.tabs.setTabEnabled(idx, bool(m.get(key, False)))
-
-        set_enabled(self.tab_summary,      "TSE_SUMMARY")
-        set_enabled(self.tab_totals,       "TSE_TOTALS")
-        set_enabled(self.tab_forecast,     "TSE_ANNUAL")
-        set_enabled(self.tab_hier_compare, "HIER_COMPARE")
-        set_enabled(self.tab_hier_health,  "HIER_HEALTH")
-        set_enabled(self.tab_ae_overview,  "AE_OVERVIEW")
-        set_enabled(self.tab_ae_annual,    "AE_ANNUAL")
+                self.tabs.setTabEnabled(idx, on)
 
     def _error(self, title: str, e: Exception):
         import traceback
@@ -221,4 +250,4 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     w = MainWindow()
     w.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
\ No newline at end of file
@@ -11,7 +11,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtGui import QAction, QColor
 
 from .common.constants import DEFAULT_FILTERS
-from .common.ui_table_utils import EqualFillSizer
+from .common.ui_table_utils import EqualFillSizer, is_year_value_col
 
 
 # ---------- Helpers ----------
@@ -117,6 +117,11 @@ class TSEForecastTab(QWidget):
       - Multi-select PRODUCT (side-by-side P1/R1/Diff per product).
       - First column is Year, then product triplets.
     """
+    # Columns read from the TSE comparison (plus every YYYY_P1 / YYYY_R1 column)
+    _COLUMNS = {
+        "TECHNICAL_SUB_ENTITY_ID", "TECHNICAL_SUB_ENTITY_NAME", "PRODUCT", "UNITS",
+        "PRODUCT_STREAM", "EQUITY_SHARE", "UNCERTAINTY", "VALUATION",
+    }
     def __init__(self):
         super().__init__()
         self.df_full: Optional[pd.DataFrame] = None
@@ -224,7 +229,7 @@ class TSEForecastTab(QWidget):
     # ============================================================
     def set_data(self, df: pd.DataFrame):
         """Provide the comparison DataFrame. Triggers filter population and first render."""
-        self.df_full = df.copy()
+        self.df_full = df.loc[:, [c for c in df.columns if c in self._COLUMNS or is_year_value_col(c)]]
         self._populate_filters()
         self._apply_filters()
         self._update_units_label(self.df_full if isinstance(self.df_full, pd.DataFrame) else pd.DataFrame())
@@ -497,4 +502,4 @@ class TSEForecastTab(QWidget):
             self.table.sortByColumn(0, Qt.AscendingOrder)
 
         # Equalize/fill after model is in place (proxy)
-        self._sizer.defer_equalize()
\ No newline at end of file
+        self._sizer.defer_equalize()
\ No newline at end of file
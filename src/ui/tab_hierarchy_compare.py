@@ -45,6 +45,9 @@ class HierarchyCompareTab(QWidget):
         "Same": "Same",
     }
 
+    # Columns read from the merged DF
+    _COLUMNS = (_UFN, _AE_P1, _AE_R1, _TE_P1, _TE_R1, _TSE_P1, _TSE_R1)
+
     def __init__(self):
         super().__init__()
 
@@ -121,7 +124,7 @@ class HierarchyCompareTab(QWidget):
             self.reset_view()
             return
 
-        self._df_raw = df.copy()
+        self._df_raw = df.loc[:, [c for c in self._COLUMNS if c in df.columns]]
 
         # Build the full view DF (with UNIQUE_FIELD_NAME kept internally)
         self._df_view_full = self._build_view_df(self._df_raw)
@@ -10,6 +10,12 @@ from .common.ui_table_utils import ColorPandasModel, EqualFillSizer
 
 
 class TSESummaryTab(QWidget):
+    # Columns read from the TSE comparison (plus every *_Diff column)
+    _COLUMNS = {
+        "TECHNICAL_SUB_ENTITY_ID", "TECHNICAL_SUB_ENTITY_NAME", "PRODUCT",
+        "PRODUCT_STREAM", "EQUITY_SHARE", "UNCERTAINTY", "VALUATION",
+    }
+
     def __init__(self):
         super().__init__()
         self.df_full = None
@@ -73,7 +79,7 @@ class TSESummaryTab(QWidget):
     # Public: Set data from MainWindow
     # ============================================================
     def set_data(self, df: pd.DataFrame):
-        self.df_full = df.copy()
+        self.df_full = df.loc[:, [c for c in df.columns if c in self._COLUMNS or str(c).endswith("_Diff")]]
         self._populate_filters()
         self._apply_filters()
 
@@ -176,4 +182,4 @@ class TSESummaryTab(QWidget):
         df_summary = pd.DataFrame(summary_rows)
         model = ColorPandasModel(df_summary)
         self.table.setModel(model)
-        self._sizer.defer_equalize()
\ No newline at end of file
+        self._sizer.defer_equalize()
\ No newline at end of file
@@ -11,7 +11,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtGui import QAction, QColor
 
 from .common.constants import DEFAULT_FILTERS
-from .common.ui_table_utils import DynamicNumericModel, EqualFillSizer
+from .common.ui_table_utils import DynamicNumericModel, EqualFillSizer, is_year_value_col
 
 
 # ---------- Helper: find "YYYY_P1" or "YYYY_R1" columns safely ----------
@@ -38,6 +38,12 @@ class TSETotalsTab(QWidget):
       <PROD> - Diff   (repeated for each selected product)
     """
 
+    # Columns read from the TSE comparison (plus every YYYY_P1 / YYYY_R1 column)
+    _COLUMNS = {
+        "TECHNICAL_SUB_ENTITY_ID", "TECHNICAL_SUB_ENTITY_NAME", "PRODUCT", "UNITS",
+        "PRODUCT_STREAM", "EQUITY_SHARE", "UNCERTAINTY", "VALUATION",
+    }
+
     def __init__(self):
         super().__init__()
         self.df_full: Optional[pd.DataFrame] = None
@@ -135,7 +141,7 @@ class TSETotalsTab(QWidget):
     # Public: Set data from MainWindow
     # ============================================================
     def set_data(self, df: pd.DataFrame):
-        self.df_full = df.copy()
+        self.df_full = df.loc[:, [c for c in df.columns if c in self._COLUMNS or is_year_value_col(c)]]
         self._populate_filters()
         self._apply_filters()
         self._update_units_label(self.df_full)
@@ -398,17 +404,17 @@ class TSETotalsTab(QWidget):
             def data(self, index, role=Qt.DisplayRole):
                 out = super().data(index, role)
                 if role == Qt.BackgroundRole:
-                    col = self._df.columns[index.column()]
+                    col = self._columns[index.column()]
                     if isinstance(col, str) and col.endswith(" - Diff"):
                         base = col[:-len(" - Diff")]
                         try:
-                            diff = float(self._df.iat[index.row(), index.column()])
+                            diff = float(self._values[index.row(), index.column()])
                         except Exception:
                             return out
                         # read matching R1 cell in same row
                         r1_col = f"{base} - R1"
                         try:
-                            r1 = float(self._df.at[self._df.index[index.row()], r1_col])
+                            r1 = float(self._values[index.row(), self._df.columns.get_loc(r1_col)])
                         except Exception:
                             r1 = 0.0
                         denom = abs(r1)